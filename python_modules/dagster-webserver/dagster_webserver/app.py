@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Optional
 
 from dagster import _check as check
@@ -7,7 +8,6 @@
 from starlette.applications import Starlette
 
 from dagster_webserver.webserver import DagsterWebserver
-from dagster_webserver.auth import create_auth_manager_from_instance_config
 
 
 def create_app_from_workspace_process_context(
@@ -35,10 +35,13 @@ def create_app_from_workspace_process_context(
 
     auth_manager = None
     try:
-        if hasattr(instance, '_settings') and instance._settings:
-            auth_storage_dir = instance.local_artifact_storage.base_dir + "/auth"
+        instance_settings = getattr(instance, "_settings", None)
+        if instance_settings and instance_settings.get("authentication"):
+            from dagster_webserver.auth import create_auth_manager_from_instance_config
+
+            auth_storage_dir = Path(instance.local_artifact_storage.base_dir) / "auth"
             auth_manager = create_auth_manager_from_instance_config(
-                instance._settings,
+                instance_settings,
                 storage_dir=auth_storage_dir,
                 base_url=path_prefix,
             )
@@ -1,22 +1,54 @@
 """Authentication and authorization module for Dagster webserver."""
 
-from .models import User, UserRole
-from .auth_backend import AuthBackend, GitHubOAuthBackend
-from .middleware import AuthenticationMiddleware
-from .permissions import Permission, has_permission, check_permission
-from .context import AuthenticatedWorkspaceRequestContext
-from .auth_manager import AuthManager, create_auth_manager_from_instance_config
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .auth_backend import AuthBackend, GitHubOAuthBackend
+    from .auth_manager import AuthManager, create_auth_manager_from_instance_config
+    from .context import AuthenticatedWorkspaceRequestContext
+    from .middleware import AuthenticationMiddleware
+    from .models import User, UserRole
+    from .permissions import Permission, check_permission, has_permission
+
+# Submodules are imported on first attribute access, so importing the package is
+# cheap when authentication is disabled
+_LAZY_IMPORTS = {
+    "User": ".models",
+    "UserRole": ".models",
+    "AuthBackend": ".auth_backend",
+    "GitHubOAuthBackend": ".auth_backend",
+    "AuthenticationMiddleware": ".middleware",
+    "Permission": ".permissions",
+    "has_permission": ".permissions",
+    "check_permission": ".permissions",
+    "AuthenticatedWorkspaceRequestContext": ".context",
+    "AuthManager": ".auth_manager",
+    "create_auth_manager_from_instance_config": ".auth_manager",
+}
 
 __all__ = [
-    "User",
-    "UserRole",
     "AuthBackend",
-    "GitHubOAuthBackend",
+    "AuthManager",
+    "AuthenticatedWorkspaceRequestContext",
     "AuthenticationMiddleware",
+    "GitHubOAuthBackend",
     "Permission",
-    "has_permission",
+    "User",
+    "UserRole",
     "check_permission",
-    "AuthenticatedWorkspaceRequestContext",
-    "AuthManager",
     "create_auth_manager_from_instance_config",
+    "has_permission",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *__all__]
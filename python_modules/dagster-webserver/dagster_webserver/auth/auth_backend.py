@@ -1,19 +1,34 @@
 """Authentication backends for different OAuth providers."""
 
+import base64
+import hashlib
+import hmac
+import os
 import secrets
+import threading
 import time
+from collections import OrderedDict
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlencode
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from starlette.concurrency import run_in_threadpool
+from urllib3.util.retry import Retry
+from datetime import datetime, timezone
 
+from . import _json
 from .models import User, UserRole
 
 
 class AuthBackend(ABC):
     """Base class for authentication backends."""
 
+    # Provider stored on users created by this backend, e.g. 'github'. Subclasses
+    # that don't set it get one derived from the class name.
+    provider_name: str
+
     @abstractmethod
     def get_authorization_url(self, state: str) -> str:
         """Get the authorization URL to redirect users to."""
@@ -29,6 +44,16 @@ def get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get user information using access token."""
         pass
 
+    async def exchange_code_for_token_async(
+        self, code: str, state: str
+    ) -> Dict[str, Any]:
+        """Exchange authorization code for access token off the event loop."""
+        return await run_in_threadpool(self.exchange_code_for_token, code, state)
+
+    async def get_user_info_async(self, access_token: str) -> Dict[str, Any]:
+        """Get user information off the event loop."""
+        return await run_in_threadpool(self.get_user_info, access_token)
+
     @abstractmethod
     def create_user_from_info(
         self, user_info: Dict[str, Any], default_role: UserRole
@@ -36,14 +61,51 @@ def create_user_from_info(
         """Create a User object from the provider's user info."""
         pass
 
+    def close(self):
+        """Release any resources held by the backend."""
+        pass
+
 
 class GitHubOAuthBackend(AuthBackend):
     """GitHub OAuth authentication backend."""
 
-    def __init__(self, client_id: str, client_secret: str, redirect_uri: str):
+    provider_name = "github"
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        redirect_uri: str,
+        user_info_cache_ttl: int = 120,
+        user_info_cache_size: int = 1024,
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
+        self._user_info_cache_ttl = user_info_cache_ttl
+        self._user_info_cache_size = user_info_cache_size
+        # sha256(access_token) -> (fetched_at, user_info)
+        self._user_info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._user_info_cache_lock = threading.Lock()
+        self._session = self._create_http_session()
+        self._executor = ThreadPoolExecutor(
+            max_workers=8, thread_name_prefix="github-oauth"
+        )
+
+    @staticmethod
+    def _create_http_session() -> requests.Session:
+        """Create a pooled HTTP session reused across OAuth calls."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        session.mount("https://", adapter)
+        session.headers.update({"Accept": "application/json"})
+        return session
 
     def get_authorization_url(self, state: str) -> str:
         """Get GitHub OAuth authorization URL."""
@@ -65,12 +127,10 @@ def exchange_code_for_token(self, code: str, state: str) -> Dict[str, Any]:
             "code": code,
             "redirect_uri": self.redirect_uri,
         }
-        headers = {"Accept": "application/json"}
-
-        response = requests.post(token_url, data=data, headers=headers, timeout=30)
+        response = self._session.post(token_url, data=data, timeout=30)
         response.raise_for_status()
 
-        token_data = response.json()
+        token_data = _json.loads(response.content)
         if "error" in token_data:
             raise ValueError(
                 f"OAuth error: {token_data.get('error_description', 'Unknown error')}"
@@ -78,90 +138,152 @@ def exchange_code_for_token(self, code: str, state: str) -> Dict[str, Any]:
 
         return token_data
 
+    def _get_json(self, url: str, headers: Dict[str, str]) -> Any:
+        """Issue a GET request on the pooled session and decode the JSON body."""
+        response = self._session.get(url, headers=headers, timeout=30)
+        response.raise_for_status()
+        return _json.loads(response.content)
+
     def get_user_info(self, access_token: str) -> Dict[str, Any]:
-        """Get GitHub user information."""
+        """Get GitHub user information, served from a short-lived cache if possible."""
+        # Key by a hash so the raw token is never kept around
+        cache_key = hashlib.sha256(access_token.encode()).hexdigest()
+        with self._user_info_cache_lock:
+            cached = self._user_info_cache.get(cache_key)
+            if cached and time.time() - cached[0] <= self._user_info_cache_ttl:
+                self._user_info_cache.move_to_end(cache_key)
+                return dict(cached[1])
+
+        user_data = self._fetch_user_info(access_token)
+
+        with self._user_info_cache_lock:
+            self._user_info_cache[cache_key] = (time.time(), user_data)
+            self._user_info_cache.move_to_end(cache_key)
+            while len(self._user_info_cache) > self._user_info_cache_size:
+                self._user_info_cache.popitem(last=False)
+
+        return dict(user_data)
+
+    def _fetch_user_info(self, access_token: str) -> Dict[str, Any]:
+        """Fetch GitHub user information from the API."""
         headers = {
             "Authorization": f"token {access_token}",
             "Accept": "application/vnd.github.v3+json",
         }
 
-        # Get user info
-        user_response = requests.get(
-            "https://api.github.com/user", headers=headers, timeout=30
+        # Fetch user emails in the background while getting user info, the two
+        # requests are independent
+        email_future = self._executor.submit(
+            self._get_json, "https://api.github.com/user/emails", headers
         )
-        user_response.raise_for_status()
-        user_data = user_response.json()
+        user_data = self._get_json("https://api.github.com/user", headers)
+        emails = email_future.result()
 
-        # Get user emails
-        email_response = requests.get(
-            "https://api.github.com/user/emails", headers=headers, timeout=30
+        # Find primary email, falling back to the first one listed
+        user_data["email"] = next(
+            (email["email"] for email in emails if email.get("primary")),
+            emails[0]["email"] if emails else None,
         )
-        email_response.raise_for_status()
-        emails = email_response.json()
-
-        # Find primary email
-        primary_email = None
-        for email in emails:
-            if email.get("primary", False):
-                primary_email = email["email"]
-                break
-
-        if not primary_email and emails:
-            primary_email = emails[0]["email"]
-
-        user_data["email"] = primary_email
         return user_data
 
     def create_user_from_info(
         self, user_info: Dict[str, Any], default_role: UserRole
     ) -> User:
         """Create User from GitHub user info."""
+        now = datetime.now(timezone.utc)
         return User(
             username=user_info["login"],
             email=user_info["email"],
             full_name=user_info.get("name"),
             role=default_role,
-            provider="github",
+            provider=self.provider_name,
             provider_id=str(user_info["id"]),
             avatar_url=user_info.get("avatar_url"),
-            created_at=datetime.now(),
-            last_login=datetime.now(),
+            created_at=now,
+            last_login=now,
         )
 
+    def close(self):
+        """Close the pooled HTTP session and worker threads."""
+        self._executor.shutdown(wait=False)
+        self._session.close()
+        with self._user_info_cache_lock:
+            self._user_info_cache.clear()
+
 
 class AuthState:
-    """Manages OAuth state for security."""
+    """Issues and validates signed OAuth states.
+
+    A state is ``base64(timestamp || nonce || hmac(timestamp || nonce))``, so it can be
+    validated without keeping any server side record of the states handed out.
+    Consumed states are remembered until they expire so each can be used once.
+    This record is per process, like the default secret.
+    """
+
+    _NONCE_SIZE = 8
+    _SIGNATURE_SIZE = 16
 
-    def __init__(self):
-        self._states: Dict[str, float] = {}  # state -> timestamp
+    def __init__(self, secret_key: Optional[str] = None):
+        # Workers only accept each other's states when they share a secret
+        secret_key = secret_key or os.environ.get("DAGSTER_SESSION_SECRET")
+        self._secret = secret_key.encode() if secret_key else secrets.token_bytes(32)
         self._state_timeout = 600  # 10 minutes
+        # payload -> time consumed, oldest first
+        self._consumed: "OrderedDict[bytes, float]" = OrderedDict()
+        self._consumed_lock = threading.Lock()
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()[
+            : self._SIGNATURE_SIZE
+        ]
 
     def generate_state(self) -> str:
-        """Generate a secure random state."""
-        state = secrets.token_urlsafe(32)
-        self._states[state] = time.time()
-        return state
+        """Generate a signed, timestamped state."""
+        payload = int(time.time()).to_bytes(8, "big") + secrets.token_bytes(
+            self._NONCE_SIZE
+        )
+        return base64.urlsafe_b64encode(payload + self._sign(payload)).decode("ascii")
 
-    def validate_state(self, state: str) -> bool:
-        """Validate and consume a state."""
-        if state not in self._states:
-            return False
+    def _valid_payload(self, state: str) -> Optional[bytes]:
+        """Return the payload of a state with a valid signature and age."""
+        try:
+            raw = base64.urlsafe_b64decode(state.encode("ascii"))
+        except (ValueError, UnicodeEncodeError):
+            return None
 
-        timestamp = self._states.pop(state)
+        payload, signature = raw[: -self._SIGNATURE_SIZE], raw[-self._SIGNATURE_SIZE :]
+        if len(payload) != 8 + self._NONCE_SIZE or not hmac.compare_digest(
+            signature, self._sign(payload)
+        ):
+            return None
 
         # Check if state hasn't expired
+        timestamp = int.from_bytes(payload[:8], "big")
         if time.time() - timestamp > self._state_timeout:
+            return None
+        return payload
+
+    def validate_state(self, state: str) -> bool:
+        """Validate a state's signature and age."""
+        return self._valid_payload(state) is not None
+
+    def consume_state(self, state: str) -> bool:
+        """Validate a state and mark it as used, rejecting states used before."""
+        payload = self._valid_payload(state)
+        if payload is None:
             return False
 
+        now = time.monotonic()
+        with self._consumed_lock:
+            # A state expires at most this long after it is consumed, so older
+            # records can't match a state that would still validate
+            while self._consumed:
+                oldest_payload, consumed_at = next(iter(self._consumed.items()))
+                if now - consumed_at <= self._state_timeout:
+                    break
+                del self._consumed[oldest_payload]
+
+            if payload in self._consumed:
+                return False
+            self._consumed[payload] = now
         return True
-
-    def cleanup_expired_states(self):
-        """Remove expired states."""
-        current_time = time.time()
-        expired_states = [
-            state
-            for state, timestamp in self._states.items()
-            if current_time - timestamp > self._state_timeout
-        ]
-        for state in expired_states:
-            del self._states[state]
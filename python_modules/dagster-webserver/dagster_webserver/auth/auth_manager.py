@@ -1,14 +1,28 @@
 """Authentication manager to coordinate all auth components."""
 
-from typing import Optional, Dict, Any, List
+import asyncio
+import contextlib
+import logging
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Dict,
+    Any,
+    List,
+    Callable,
+    AsyncIterator,
+    Union,
+)
 from pathlib import Path
 
 from .models import UserRole
-from .auth_backend import AuthBackend, GitHubOAuthBackend
 from .session_manager import SessionManager
 from .user_store import UserStore
-from .middleware import AuthenticationMiddleware
-from .routes import AuthRoutes
+from .permissions import DEFAULT_ROUTE_PERMISSIONS
+
+if TYPE_CHECKING:
+    from .auth_backend import AuthBackend
+    from .routes import AuthRoutes
 
 
 class AuthManager:
@@ -17,28 +31,37 @@ class AuthManager:
     def __init__(
         self,
         auth_config: Dict[str, Any],
-        storage_dir: str,
+        storage_dir: Union[str, Path],
         base_url: str = "",
     ):
         self.auth_config = auth_config
         self.storage_dir = Path(storage_dir)
         self.base_url = base_url
+        self.cleanup_interval = self.auth_config.get("cleanup_interval", 60)
+        # The cleanup loop sleeps this long between sweeps, so zero would spin
+        if self.cleanup_interval <= 0:
+            raise ValueError(
+                f"cleanup_interval must be positive, got {self.cleanup_interval}"
+            )
 
-        # Create storage directory
-        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        # Create storage directory, usually already present on restarts
+        if not self.storage_dir.is_dir():
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
 
         # Initialize components
         self.auth_backend = self._create_auth_backend()
         self.session_manager = self._create_session_manager()
         self.user_store = self._create_user_store()
-        self.middleware = self._create_middleware()
         self.routes = self._create_routes()
 
-    def _create_auth_backend(self) -> AuthBackend:
+    def _create_auth_backend(self) -> "AuthBackend":
         """Create authentication backend based on configuration."""
         provider = self.auth_config.get("provider", "github")
 
         if provider == "github":
+            # Deferred so `requests` is only loaded when GitHub OAuth is configured
+            from .auth_backend import GitHubOAuthBackend
+
             client_id = self.auth_config.get("github", {}).get("client_id")
             client_secret = self.auth_config.get("github", {}).get("client_secret")
             redirect_uri = self.auth_config.get("github", {}).get("redirect_uri")
@@ -71,21 +94,23 @@ def _create_user_store(self) -> UserStore:
             role_assignments=role_assignments,
         )
 
-    def _create_middleware(self) -> AuthenticationMiddleware:
-        """Create authentication middleware."""
-        login_url = f"{self.base_url}/auth/login"
-        public_paths = self.auth_config.get("public_paths", [])
+    def get_middleware_options(self) -> Dict[str, Any]:
+        """Get the keyword arguments used to construct the authentication middleware."""
+        return {
+            "session_manager": self.session_manager,
+            "user_store": self.user_store,
+            "login_url": f"{self.base_url}/auth/login",
+            "public_paths": self.auth_config.get("public_paths", []),
+        }
 
-        return AuthenticationMiddleware(
-            app=None,  # Will be set when creating the app
-            session_manager=self.session_manager,
-            user_store=self.user_store,
-            login_url=login_url,
-            public_paths=public_paths,
-        )
+    def get_permission_guard_options(self) -> Dict[str, Any]:
+        """Get the keyword arguments used to construct the permission guard."""
+        return {"route_permissions": DEFAULT_ROUTE_PERMISSIONS}
 
-    def _create_routes(self) -> AuthRoutes:
+    def _create_routes(self) -> "AuthRoutes":
         """Create authentication routes."""
+        from .routes import AuthRoutes
+
         default_role_str = self.auth_config.get("default_role", "viewer")
         try:
             default_role = UserRole(default_role_str.lower())
@@ -100,10 +125,6 @@ def _create_routes(self) -> AuthRoutes:
             base_url=self.base_url,
         )
 
-    def get_middleware(self) -> AuthenticationMiddleware:
-        """Get the authentication middleware."""
-        return self.middleware
-
     def get_auth_routes(self) -> List:
         """Get the authentication routes."""
         return self.routes.get_routes()
@@ -115,24 +136,59 @@ def update_role_assignments(self, role_assignments: Dict[str, str]):
 
     def get_stats(self) -> Dict[str, Any]:
         """Get authentication system statistics."""
+        # Every user has exactly one role, so the per-role counts also give the total
+        # without copying the user list
+        users_by_role = self.user_store.count_users_by_role()
         return {
             "active_sessions": self.session_manager.get_active_session_count(),
-            "total_users": len(self.user_store.list_users()),
+            "total_users": sum(users_by_role.values()),
             "users_by_role": {
-                role.value: count
-                for role, count in self.user_store.count_users_by_role().items()
+                role.value: count for role, count in users_by_role.items()
             },
             "provider": self.auth_config.get("provider"),
         }
 
+    async def _cleanup_loop(self):
+        """Periodically remove expired sessions."""
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                self.session_manager.cleanup_expired_sessions()
+            except Exception:
+                logging.getLogger("dagster.webserver").exception(
+                    "Failed to clean up expired authentication state"
+                )
+
+    def wrap_lifespan(self, lifespan: Optional[Callable] = None) -> Callable:
+        """Wrap an app lifespan to run the periodic auth cleanup while the app is up."""
+
+        @contextlib.asynccontextmanager
+        async def _lifespan(app) -> AsyncIterator:
+            cleanup_task = asyncio.create_task(self._cleanup_loop())
+            try:
+                if lifespan:
+                    async with lifespan(app) as state:
+                        yield state
+                else:
+                    yield
+            finally:
+                cleanup_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await cleanup_task
+                self.cleanup()
+
+        return _lifespan
+
     def cleanup(self):
         """Cleanup authentication resources."""
         self.session_manager.cleanup_expired_sessions()
+        self.auth_backend.close()
+        self.user_store.close()
 
 
 def create_auth_manager_from_instance_config(
     instance_config: Dict[str, Any],
-    storage_dir: str,
+    storage_dir: Union[str, Path],
     base_url: str = "",
 ) -> Optional[AuthManager]:
     """Create AuthManager from Dagster instance configuration."""
@@ -1,17 +1,47 @@
 """Authenticated workspace request context."""
 
-from typing import Optional, Mapping
+from typing import Dict, Optional, Mapping
 
 from dagster._core.workspace.context import WorkspaceRequestContext
 from dagster._core.workspace.permissions import PermissionResult
 
-from .models import User
-from .permissions import PermissionChecker, has_permission, Permission
+from .models import User, UserRole, RolePermissions
+from .permissions import PermissionChecker, Permission
+
+
+def _build_role_permissions(role: UserRole) -> Dict[str, PermissionResult]:
+    """Build the permission results reported for users with a role."""
+    role_permissions = RolePermissions.get_permissions_for_role(role)
+    denied = PermissionResult(
+        enabled=False,
+        disabled_reason=f"Role '{role.value}' does not have this permission",
+    )
+    allowed = PermissionResult(enabled=True, disabled_reason=None)
+
+    return {
+        perm.value: allowed if perm.value in role_permissions else denied
+        for perm in Permission
+    }
+
+
+# The results only depend on the role, so they are built once and shared by every
+# request context instead of per request
+_ROLE_PERMISSION_RESULTS: Mapping[UserRole, Mapping[str, PermissionResult]] = {
+    role: _build_role_permissions(role) for role in UserRole
+}
 
 
 class AuthenticatedWorkspaceRequestContext(WorkspaceRequestContext):
     """Workspace request context with authentication information."""
 
+    # No user, all permissions are disabled
+    _NO_USER_PERMISSIONS: Mapping[str, PermissionResult] = {
+        perm.value: PermissionResult(
+            enabled=False, disabled_reason="Authentication required"
+        )
+        for perm in Permission
+    }
+
     def __init__(self, *args, user: Optional[User] = None, **kwargs):
         super().__init__(*args, **kwargs)
         self._user = user
@@ -27,29 +57,18 @@ def permission_checker(self) -> PermissionChecker:
         """Get the permission checker for this user."""
         return self._permission_checker
 
+    @property
+    def _permissions_map(self) -> Mapping[str, PermissionResult]:
+        """Permissions for the user's role."""
+        if not self._user:
+            return self._NO_USER_PERMISSIONS
+
+        return _ROLE_PERMISSION_RESULTS[self._user.role]
+
     @property
     def permissions(self) -> Mapping[str, PermissionResult]:
         """Override permissions based on user's role."""
-        if not self._user:
-            # No user, return all permissions as disabled
-            return {
-                perm.value: PermissionResult(
-                    enabled=False, message="Authentication required"
-                )
-                for perm in Permission
-            }
-
-        user_permissions = self._permission_checker.get_permissions()
-
-        return {
-            perm.value: PermissionResult(
-                enabled=perm.value in user_permissions,
-                message=""
-                if perm.value in user_permissions
-                else f"Role '{self._user.role.value}' does not have this permission",
-            )
-            for perm in Permission
-        }
+        return self._permissions_map
 
     def permissions_for_location(
         self, *, location_name: str
@@ -57,47 +76,36 @@ def permissions_for_location(
         """Override location-specific permissions based on user's role."""
         # For now, use the same permissions for all locations
         # This can be extended to support location-specific permissions
-        return self.permissions
+        return self._permissions_map
 
     def has_permission(self, permission: str) -> bool:
         """Check if the user has a specific permission."""
-        if not self._user:
+        if not self._user or not self._user.is_active:
             return False
 
-        try:
-            perm = Permission(permission)
-            return has_permission(self._user, perm)
-        except ValueError:
-            # Unknown permission, default to False
-            return False
+        # Check the role's precomputed permission set directly, which also covers
+        # unknown permissions without building a Permission first
+        return permission in RolePermissions.get_permissions_for_role(self._user.role)
 
     def get_viewer_tags(self) -> dict[str, str]:
         """Get tags to identify the current viewer."""
         if not self._user:
             return {}
 
-        return {
-            "dagster.user.username": self._user.username,
-            "dagster.user.email": self._user.email,
-            "dagster.user.role": self._user.role.value,
-            "dagster.user.provider": self._user.provider,
-        }
+        # Build a new dict from the precomputed tags, callers are free to add to it
+        return dict(self._user.viewer_tags)
 
     def get_reporting_user_tags(self) -> dict[str, str]:
         """Get tags for reporting purposes."""
         if not self._user:
             return {}
 
-        return {
-            "user": self._user.username,
-            "user_email": self._user.email,
-            "user_role": self._user.role.value,
-        }
+        return dict(self._user.reporting_user_tags)
 
     @property
     def show_instance_config(self) -> bool:
         """Determine if instance config should be shown to the user."""
-        return has_permission(self._user, Permission.VIEW_INSTANCE_CONFIG)
+        return self._permission_checker.can_view_instance_config()
 
     def is_read_only_for_location(self, location_name: str) -> bool:
         """Check if a location is read-only for the current user."""
@@ -106,30 +114,24 @@ def is_read_only_for_location(self, location_name: str) -> bool:
             return True
 
         # Viewers and below get read-only access
-        from .models import UserRole
-
         return not self._user.has_permission(UserRole.LAUNCHER)
 
     def can_terminate_runs(self) -> bool:
         """Check if user can terminate runs."""
-        return has_permission(self._user, Permission.TERMINATE_RUNS)
+        return self._permission_checker.can_terminate_runs()
 
     def can_delete_runs(self) -> bool:
         """Check if user can delete runs."""
-        return has_permission(self._user, Permission.DELETE_RUNS)
+        return self._permission_checker.can_delete_runs()
 
     def can_launch_runs(self) -> bool:
         """Check if user can launch runs."""
-        return has_permission(self._user, Permission.LAUNCH_RUNS)
+        return self._permission_checker.can_launch_runs()
 
     def can_manage_schedules(self) -> bool:
         """Check if user can manage schedules."""
-        return has_permission(
-            self._user, Permission.START_SCHEDULES
-        ) and has_permission(self._user, Permission.STOP_SCHEDULES)
+        return self._permission_checker.can_manage_schedules()
 
     def can_manage_sensors(self) -> bool:
         """Check if user can manage sensors."""
-        return has_permission(self._user, Permission.START_SENSORS) and has_permission(
-            self._user, Permission.STOP_SENSORS
-        )
+        return self._permission_checker.can_manage_sensors()
@@ -1,18 +1,29 @@
 """Authentication middleware for Dagster webserver."""
 
-from typing import Optional, Callable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, RedirectResponse, JSONResponse
-from starlette.types import ASGIApp
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .models import User
 from .session_manager import SessionManager
 from .user_store import UserStore
 
+# Matches the session cookie in a raw Cookie header, e.g. b"a=1; dagster_session_id=..."
+_SESSION_ID_RE = re.compile(rb"(?:^|;)\s*dagster_session_id=([^;\s]+)")
+
 
-class AuthenticationMiddleware(BaseHTTPMiddleware):
-    """Middleware to handle authentication for all requests."""
+class AuthenticationMiddleware:
+    """ASGI middleware to handle authentication for all HTTP requests."""
+
+    # How long a resolved session is trusted before hitting the stores again
+    USER_CACHE_TTL = 30
+    USER_CACHE_SIZE = 4096
 
     def __init__(
         self,
@@ -22,26 +33,38 @@ def __init__(
         login_url: str = "/auth/login",
         public_paths: Optional[list[str]] = None,
     ):
-        super().__init__(app)
+        self.app = app
         self.session_manager = session_manager
         self.user_store = user_store
         self.login_url = login_url
 
+        # session_id -> (resolved_at, user)
+        self._user_cache: OrderedDict[str, Tuple[float, User]] = OrderedDict()
+        self._user_cache_lock = threading.Lock()
+        # Bumped whenever a user changes, so a lookup racing with the change
+        # doesn't cache the user it read before the change
+        self._user_cache_generation = 0
+        self.session_manager.add_invalidation_listener(self.invalidate)
+        self.user_store.add_change_listener(self.invalidate_user)
+
         # Default public paths that don't require authentication
-        self.public_paths = public_paths or [
-            "/auth/login",
-            "/auth/callback",
-            "/auth/logout",
-            "/server_info",
-            "/dagit_info",
-            "/favicon.ico",
-            "/favicon.png",
-            "/favicon.svg",
-            "/robots.txt",
-        ]
+        self.public_paths: frozenset[str] = frozenset(
+            public_paths
+            or [
+                "/auth/login",
+                "/auth/callback",
+                "/auth/logout",
+                "/server_info",
+                "/dagit_info",
+                "/favicon.ico",
+                "/favicon.png",
+                "/favicon.svg",
+                "/robots.txt",
+            ]
+        )
 
         # Static file patterns that should be public
-        self.public_patterns = [
+        self.public_patterns: tuple[str, ...] = (
             "/static/",
             "/vendor/",
             "/.css",
@@ -55,52 +78,67 @@ def __init__(
             "/.woff",
             "/.woff2",
             "/.ttf",
-        ]
+        )
+
+        # Precompiled form of the patterns, so the per-request check is C-level string
+        # matching. Directory patterns only match at the start of the path, so a
+        # dynamic route can't be made public by embedding one in it. Static files
+        # themselves are served before this middleware runs.
+        self._public_pattern_re = re.compile(
+            "|".join(
+                ("^" if pattern.endswith("/") else "") + re.escape(pattern)
+                for pattern in self.public_patterns
+            )
+        )
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process authentication for each request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
         # Check if this is a public path
-        if self._is_public_path(request.url.path):
-            return await call_next(request)
+        if self._is_public_path(get_route_path(scope)):
+            await self.app(scope, receive, send)
+            return
 
         # Get user from session
-        user = self._get_authenticated_user(request)
+        user = self._get_authenticated_user(scope)
 
         # Add user to request state
-        request.state.user = user
+        scope.setdefault("state", {})["user"] = user
 
         # If user is not authenticated, handle based on request type
         if not user:
-            return await self._handle_unauthenticated_request(request)
+            response = self._handle_unauthenticated_request(scope)
+            await response(scope, receive, send)
+            return
 
         # User is authenticated, proceed with request
-        response = await call_next(request)
-
-        # Cleanup expired sessions periodically
-        self.session_manager.cleanup_expired_sessions()
-
-        return response
+        await self.app(scope, receive, send)
 
     def _is_public_path(self, path: str) -> bool:
         """Check if the path is public and doesn't require authentication."""
-        # Check exact matches
         if path in self.public_paths:
             return True
 
-        # Check patterns
-        for pattern in self.public_patterns:
-            if pattern in path:
-                return True
-
-        return False
+        return self._public_pattern_re.search(path) is not None
 
-    def _get_authenticated_user(self, request: Request) -> Optional[User]:
+    def _get_authenticated_user(self, scope: Scope) -> Optional[User]:
         """Get authenticated user from request."""
         # Try to get session ID from cookie
-        session_id = request.cookies.get("dagster_session_id")
-        if not session_id:
+        match = _SESSION_ID_RE.search(_get_header(scope, b"cookie"))
+        if not match:
             return None
+        session_id = match.group(1).decode("latin-1")
+
+        now = time.monotonic()
+        with self._user_cache_lock:
+            cached = self._user_cache.get(session_id)
+            if cached and now - cached[0] <= self.USER_CACHE_TTL:
+                self._user_cache.move_to_end(session_id)
+                return cached[1]
+            generation = self._user_cache_generation
 
         # Get user from session
         user = self.session_manager.get_user_from_session(session_id)
@@ -114,15 +152,41 @@ def _get_authenticated_user(self, request: Request) -> Optional[User]:
             self.session_manager.invalidate_session(session_id)
             return None
 
+        with self._user_cache_lock:
+            if generation == self._user_cache_generation:
+                self._user_cache[session_id] = (now, stored_user)
+                self._user_cache.move_to_end(session_id)
+                while len(self._user_cache) > self.USER_CACHE_SIZE:
+                    self._user_cache.popitem(last=False)
+
         return stored_user
 
-    async def _handle_unauthenticated_request(self, request: Request) -> Response:
+    def invalidate(self, session_id: str):
+        """Drop the cached user for a session."""
+        with self._user_cache_lock:
+            self._user_cache.pop(session_id, None)
+
+    def invalidate_user(self, username: str):
+        """Drop the cached entries of a user, e.g. after a role change."""
+        with self._user_cache_lock:
+            self._user_cache_generation += 1
+            stale_sessions = [
+                session_id
+                for session_id, (_, user) in self._user_cache.items()
+                if user.username == username
+            ]
+            for session_id in stale_sessions:
+                del self._user_cache[session_id]
+
+    def _handle_unauthenticated_request(self, scope: Scope) -> Response:
         """Handle unauthenticated requests."""
+        path = get_route_path(scope)
+
         # For API/GraphQL requests, return 401
         if (
-            request.url.path.startswith("/graphql")
-            or request.url.path.startswith("/api/")
-            or "application/json" in request.headers.get("accept", "")
+            path.startswith("/graphql")
+            or path.startswith("/api/")
+            or b"application/json" in _get_header(scope, b"accept")
         ):
             return JSONResponse(
                 {"error": "Authentication required", "login_url": self.login_url},
@@ -133,6 +197,23 @@ async def _handle_unauthenticated_request(self, request: Request) -> Response:
         return RedirectResponse(url=self.login_url, status_code=302)
 
 
-def get_current_user(request: Request) -> Optional[User]:
+def get_route_path(scope: Scope) -> str:
+    """Get the request path relative to the mount point, e.g. without a path prefix."""
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path) :]
+    return path
+
+
+def _get_header(scope: Scope, name: bytes) -> bytes:
+    """Get a raw header value from the ASGI scope without building a Request."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return b""
+
+
+def get_current_user(request: HTTPConnection) -> Optional[User]:
     """Helper function to get current user from request."""
     return getattr(request.state, "user", None)
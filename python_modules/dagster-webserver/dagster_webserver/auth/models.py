@@ -1,10 +1,14 @@
 """User models and role definitions for RBAC."""
 
+import sys
 from enum import Enum
-from typing import Dict, Optional, Set
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 
+from . import _json
+
 
 class UserRole(Enum):
     """User roles with hierarchical permissions."""
@@ -17,22 +21,33 @@ class UserRole(Enum):
     @property
     def level(self) -> int:
         """Return role level for hierarchy checks."""
-        levels = {
-            UserRole.VIEWER: 1,
-            UserRole.LAUNCHER: 2,
-            UserRole.EDITOR: 3,
-            UserRole.ADMIN: 4,
-        }
-        return levels[self]
+        return _ROLE_LEVELS[self]
 
     def has_permission_of(self, other_role: "UserRole") -> bool:
         """Check if this role has at least the permissions of another role."""
-        return self.level >= other_role.level
+        return _ROLE_LEVELS[self] >= _ROLE_LEVELS[other_role]
+
+
+_ROLE_LEVELS: Mapping[UserRole, int] = MappingProxyType(
+    {
+        UserRole.VIEWER: 1,
+        UserRole.LAUNCHER: 2,
+        UserRole.EDITOR: 3,
+        UserRole.ADMIN: 4,
+    }
+)
 
 
-@dataclass
+# Slotted dataclasses are only available on Python 3.10+
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class User:
-    """User model with authentication and authorization info."""
+    """User model with authentication and authorization info.
+
+    Users are immutable, use ``dataclasses.replace`` to derive an updated user.
+    """
 
     username: str
     email: str
@@ -45,6 +60,40 @@ class User:
     last_login: Optional[datetime] = None
     is_active: bool = True
 
+    # Derived from the fields above once, at construction. Stored as (key, value)
+    # pairs, which are immutable and can still be pickled and copied.
+    viewer_tags: Tuple[Tuple[str, str], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    reporting_user_tags: Tuple[Tuple[str, str], ...] = field(
+        init=False, repr=False, compare=False
+    )
+    # JSON encoding of to_dict(), computed on first use
+    _encoded: Optional[bytes] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "viewer_tags",
+            (
+                ("dagster.user.username", self.username),
+                ("dagster.user.email", self.email),
+                ("dagster.user.role", self.role.value),
+                ("dagster.user.provider", self.provider),
+            ),
+        )
+        object.__setattr__(
+            self,
+            "reporting_user_tags",
+            (
+                ("user", self.username),
+                ("user_email", self.email),
+                ("user_role", self.role.value),
+            ),
+        )
+
     def has_permission(self, required_role: UserRole) -> bool:
         """Check if user has required role permissions."""
         return self.is_active and self.role.has_permission_of(required_role)
@@ -70,6 +119,14 @@ def to_dict(self) -> Dict:
             "is_active": self.is_active,
         }
 
+    def to_json(self) -> bytes:
+        """Convert user to JSON-encoded bytes, reusing the encoding once computed."""
+        encoded = self._encoded
+        if encoded is None:
+            encoded = _json.dumps(self.to_dict())
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
+
     @classmethod
     def from_dict(cls, data: Dict) -> "User":
         """Create user from dictionary."""
@@ -91,6 +148,22 @@ def from_dict(cls, data: Dict) -> "User":
         )
 
 
+def _compute_role_closure(
+    role_permissions: Dict[UserRole, Set[str]],
+) -> Dict[UserRole, FrozenSet[str]]:
+    """Resolve each role's permissions including those inherited from lower roles."""
+    return {
+        role: frozenset().union(
+            *(
+                permissions
+                for r, permissions in role_permissions.items()
+                if role.has_permission_of(r)
+            )
+        )
+        for role in UserRole
+    }
+
+
 class RolePermissions:
     """Defines permissions for each role."""
 
@@ -128,20 +201,24 @@ class RolePermissions:
         },
     }
 
+    # The role hierarchy is static, so inherited permissions are resolved once
+    _ROLE_CLOSURE = _compute_role_closure(ROLE_PERMISSIONS)
+    # Sorted, JSON-serializable form of each closure for API responses
+    _ROLE_PERMISSION_LISTS = {
+        role: tuple(sorted(permissions)) for role, permissions in _ROLE_CLOSURE.items()
+    }
+
     @classmethod
-    def get_permissions_for_role(cls, role: UserRole) -> Set[str]:
+    def get_permissions_for_role(cls, role: UserRole) -> FrozenSet[str]:
         """Get all permissions for a role (including inherited permissions)."""
-        permissions = set()
+        return cls._ROLE_CLOSURE[role]
 
-        # Add permissions for this role and all lower roles
-        for r in UserRole:
-            if role.has_permission_of(r):
-                permissions.update(cls.ROLE_PERMISSIONS.get(r, set()))
-
-        return permissions
+    @classmethod
+    def get_permission_list_for_role(cls, role: UserRole) -> Tuple[str, ...]:
+        """Get all permissions for a role as a sorted tuple."""
+        return cls._ROLE_PERMISSION_LISTS[role]
 
     @classmethod
     def has_permission(cls, user_role: UserRole, permission: str) -> bool:
         """Check if a role has a specific permission."""
-        user_permissions = cls.get_permissions_for_role(user_role)
-        return permission in user_permissions
+        return permission in cls._ROLE_CLOSURE[user_role]
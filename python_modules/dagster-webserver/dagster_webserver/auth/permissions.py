@@ -1,13 +1,17 @@
 """Permission system for fine-grained access control."""
 
+import json
 from enum import Enum
-from typing import Optional
-from functools import wraps
+from functools import reduce, wraps
+from operator import or_
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
 
 from starlette.requests import Request
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from .models import User, UserRole, RolePermissions
+from .middleware import get_route_path
+from .models import RolePermissions, User, UserRole
 
 
 class Permission(Enum):
@@ -44,12 +48,54 @@ class Permission(Enum):
     ACCESS_ALL_LOCATIONS = "access_all_locations"
 
 
+# Each permission is assigned one bit, so a role's permissions fit in a single int
+# and checks are a bitwise AND
+_PERMISSION_BITS: Dict[Permission, int] = {perm: 1 << i for i, perm in enumerate(Permission)}
+
+_ROLE_MASKS: Dict[UserRole, int] = {
+    role: reduce(
+        or_,
+        (
+            _PERMISSION_BITS[Permission(perm)]
+            for perm in RolePermissions.get_permissions_for_role(role)
+        ),
+        0,
+    )
+    for role in UserRole
+}
+
+_MANAGE_SCHEDULES_MASK = (
+    _PERMISSION_BITS[Permission.START_SCHEDULES] | _PERMISSION_BITS[Permission.STOP_SCHEDULES]
+)
+_MANAGE_SENSORS_MASK = (
+    _PERMISSION_BITS[Permission.START_SENSORS] | _PERMISSION_BITS[Permission.STOP_SENSORS]
+)
+
+
 def has_permission(user: Optional[User], permission: Permission) -> bool:
     """Check if user has a specific permission."""
     if not user or not user.is_active:
         return False
 
-    return RolePermissions.has_permission(user.role, permission.value)
+    return bool(_ROLE_MASKS[user.role] & _PERMISSION_BITS[permission])
+
+
+def _has_all_permissions(user: Optional[User], mask: int) -> bool:
+    """Check if user has every permission in a precomputed mask."""
+    if not user or not user.is_active:
+        return False
+
+    return (_ROLE_MASKS[user.role] & mask) == mask
+
+
+def can_manage_schedules(user: Optional[User]) -> bool:
+    """Check if user can both start and stop schedules."""
+    return _has_all_permissions(user, _MANAGE_SCHEDULES_MASK)
+
+
+def can_manage_sensors(user: Optional[User]) -> bool:
+    """Check if user can both start and stop sensors."""
+    return _has_all_permissions(user, _MANAGE_SENSORS_MASK)
 
 
 def check_permission(user: Optional[User], permission: Permission) -> bool:
@@ -59,31 +105,30 @@ def check_permission(user: Optional[User], permission: Permission) -> bool:
     return True
 
 
+def _get_request(args: tuple, kwargs: dict) -> Request:
+    """Get the request passed to a Starlette endpoint or endpoint method."""
+    # Endpoints receive the request first, methods receive it right after self
+    for arg in args[:2]:
+        if isinstance(arg, Request):
+            return arg
+
+    request = kwargs.get("request")
+    if request is None:
+        raise ValueError("Request object not found in function arguments")
+    return request
+
+
 def require_permission(permission: Permission):
     """Decorator to require a specific permission."""
+    error = {"error": f"Permission '{permission.value}' required"}
 
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Find request object in args or kwargs
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-            if not request and "request" in kwargs:
-                request = kwargs["request"]
-
-            if not request:
-                raise ValueError("Request object not found in function arguments")
-
-            user = getattr(request.state, "user", None)
+            user = getattr(_get_request(args, kwargs).state, "user", None)
 
             if not has_permission(user, permission):
-                return JSONResponse(
-                    {"error": f"Permission '{permission.value}' required"},
-                    status_code=403,
-                )
+                return JSONResponse(error, status_code=403)
 
             return await func(*args, **kwargs)
 
@@ -94,29 +139,15 @@ async def wrapper(*args, **kwargs):
 
 def require_role(required_role: UserRole):
     """Decorator to require a minimum role level."""
+    error = {"error": f"Role '{required_role.value}' or higher required"}
 
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Find request object in args or kwargs
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-            if not request and "request" in kwargs:
-                request = kwargs["request"]
-
-            if not request:
-                raise ValueError("Request object not found in function arguments")
-
-            user = getattr(request.state, "user", None)
+            user = getattr(_get_request(args, kwargs).state, "user", None)
 
             if not user or not user.has_permission(required_role):
-                return JSONResponse(
-                    {"error": f"Role '{required_role.value}' or higher required"},
-                    status_code=403,
-                )
+                return JSONResponse(error, status_code=403)
 
             return await func(*args, **kwargs)
 
@@ -125,48 +156,146 @@ async def wrapper(*args, **kwargs):
     return decorator
 
 
+# Maps a path, or a (method, path) pair, to the permissions it requires
+RoutePermissions = Mapping[Union[str, Tuple[str, str]], Iterable[Permission]]
+
+# Permissions for the webserver's HTTP endpoints outside of GraphQL, which
+# checks permissions through the request context instead
+DEFAULT_ROUTE_PERMISSIONS: RoutePermissions = {
+    "/logs/": [Permission.VIEW_LOGS],
+    "/download_debug/": [Permission.VIEW_RUNS],
+    "/notebook": [Permission.VIEW_WORKSPACE],
+    "/dagit/notebook": [Permission.VIEW_WORKSPACE],
+    ("POST", "/report_asset_materialization/"): [Permission.LAUNCH_RUNS],
+    ("POST", "/report_asset_check/"): [Permission.LAUNCH_RUNS],
+    ("POST", "/report_asset_observation/"): [Permission.LAUNCH_RUNS],
+}
+
+
+def _permission_error(permissions: Iterable[Permission]) -> str:
+    """Format the error for missing permissions like ``require_permission`` does."""
+    required = ", ".join(sorted(f"'{perm.value}'" for perm in permissions))
+    plural = "s" if "," in required else ""
+    return f"Permission{plural} {required} required"
+
+
+class PermissionGuard:
+    """ASGI middleware rejecting requests to paths the user lacks permissions for.
+
+    ``route_permissions`` maps a path, or a ``(method, path)`` pair, to the
+    permissions it requires. A path on its own applies to every method, and a
+    ``(method, path)`` entry takes precedence over it. Paths ending in ``/`` are
+    prefixes guarding everything below them, e.g. routes with path parameters;
+    exact paths take precedence over prefixes, and longer prefixes over shorter.
+
+    Must be installed inside ``AuthenticationMiddleware``, which puts the user on the
+    request state. Denied requests get a 403 without building a Request or Response.
+    """
+
+    def __init__(self, app: ASGIApp, route_permissions: RoutePermissions):
+        self.app = app
+        # (method, path) -> (required permission mask, pre-encoded 403 body), so
+        # each request is a dict lookup, or a few prefix checks, and a bitwise AND.
+        # Path-only entries use a method of None, so they apply to any method.
+        self._route_permissions: Dict[Tuple[Optional[str], str], Tuple[int, bytes]] = {}
+        self._prefix_permissions: Dict[Tuple[Optional[str], str], Tuple[int, bytes]] = {}
+        for key, permissions in route_permissions.items():
+            required = set(permissions)
+            mask = reduce(or_, (_PERMISSION_BITS[perm] for perm in required), 0)
+            body = json.dumps(
+                {"error": _permission_error(required)}, separators=(",", ":")
+            ).encode()
+            method, path = (None, key) if isinstance(key, str) else (key[0].upper(), key[1])
+            table = self._prefix_permissions if path.endswith("/") else self._route_permissions
+            table[(method, path)] = (mask, body)
+        # Longest first, so the most specific prefix wins
+        prefixes = {path for _, path in self._prefix_permissions}
+        self._prefixes = tuple(sorted(prefixes, key=len, reverse=True))
+
+    def _get_required(self, method: str, path: str) -> Optional[Tuple[int, bytes]]:
+        """Return the permission mask and 403 body guarding a request, if any."""
+        table = self._route_permissions
+        guarded = table.get((method, path)) or table.get((None, path))
+        if guarded is None and self._prefixes and path.startswith(self._prefixes):
+            table = self._prefix_permissions
+            for prefix in self._prefixes:
+                if path.startswith(prefix):
+                    guarded = table.get((method, prefix)) or table.get((None, prefix))
+                    if guarded is not None:
+                        break
+        return guarded
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            guarded = self._get_required(scope["method"], get_route_path(scope))
+            if guarded is not None:
+                mask, body = guarded
+                user = scope.get("state", {}).get("user")
+                if not user or not user.is_active or (_ROLE_MASKS[user.role] & mask) != mask:
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 403,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                            ],
+                        }
+                    )
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+        await self.app(scope, receive, send)
+
+
 class PermissionChecker:
-    """Helper class for checking permissions in different contexts."""
+    """Helper class for checking permissions in different contexts.
+
+    The user's permission mask is resolved once, so each check is a single
+    bitwise AND.
+    """
+
+    __slots__ = ("_mask", "user")
 
     def __init__(self, user: Optional[User]):
         self.user = user
+        self._mask = _ROLE_MASKS[user.role] if user and user.is_active else 0
+
+    def _has(self, permission: Permission) -> bool:
+        return bool(self._mask & _PERMISSION_BITS[permission])
 
     def can_view_runs(self) -> bool:
-        return has_permission(self.user, Permission.VIEW_RUNS)
+        return self._has(Permission.VIEW_RUNS)
 
     def can_launch_runs(self) -> bool:
-        return has_permission(self.user, Permission.LAUNCH_RUNS)
+        return self._has(Permission.LAUNCH_RUNS)
 
     def can_terminate_runs(self) -> bool:
-        return has_permission(self.user, Permission.TERMINATE_RUNS)
+        return self._has(Permission.TERMINATE_RUNS)
 
     def can_delete_runs(self) -> bool:
-        return has_permission(self.user, Permission.DELETE_RUNS)
+        return self._has(Permission.DELETE_RUNS)
 
     def can_reexecute_runs(self) -> bool:
-        return has_permission(self.user, Permission.REEXECUTE_RUNS)
+        return self._has(Permission.REEXECUTE_RUNS)
 
     def can_view_assets(self) -> bool:
-        return has_permission(self.user, Permission.VIEW_ASSETS)
+        return self._has(Permission.VIEW_ASSETS)
 
     def can_manage_schedules(self) -> bool:
-        return has_permission(self.user, Permission.START_SCHEDULES) and has_permission(
-            self.user, Permission.STOP_SCHEDULES
-        )
+        return (self._mask & _MANAGE_SCHEDULES_MASK) == _MANAGE_SCHEDULES_MASK
 
     def can_manage_sensors(self) -> bool:
-        return has_permission(self.user, Permission.START_SENSORS) and has_permission(
-            self.user, Permission.STOP_SENSORS
-        )
+        return (self._mask & _MANAGE_SENSORS_MASK) == _MANAGE_SENSORS_MASK
 
     def can_manage_users(self) -> bool:
-        return has_permission(self.user, Permission.MANAGE_USERS)
+        return self._has(Permission.MANAGE_USERS)
 
     def can_view_instance_config(self) -> bool:
-        return has_permission(self.user, Permission.VIEW_INSTANCE_CONFIG)
+        return self._has(Permission.VIEW_INSTANCE_CONFIG)
 
     def can_manage_instance_config(self) -> bool:
-        return has_permission(self.user, Permission.MANAGE_INSTANCE_CONFIG)
+        return self._has(Permission.MANAGE_INSTANCE_CONFIG)
 
     def is_admin(self) -> bool:
         return self.user is not None and self.user.role == UserRole.ADMIN
@@ -174,8 +303,14 @@ def is_admin(self) -> bool:
     def get_role(self) -> Optional[UserRole]:
         return self.user.role if self.user else None
 
-    def get_permissions(self) -> set[str]:
+    def get_permissions(self) -> frozenset[str]:
         """Get all permissions for the user."""
         if not self.user:
-            return set()
+            return frozenset()
         return RolePermissions.get_permissions_for_role(self.user.role)
+
+    def get_permission_list(self) -> Tuple[str, ...]:
+        """Get all permissions for the user as a sorted tuple."""
+        if not self.user:
+            return ()
+        return RolePermissions.get_permission_list_for_role(self.user.role)
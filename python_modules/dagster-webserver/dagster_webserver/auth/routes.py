@@ -1,5 +1,13 @@
 """Authentication routes for login, logout, and OAuth handling."""
 
+import asyncio
+import hmac
+import html
+import zlib
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
 from starlette.requests import Request
 from starlette.responses import Response, RedirectResponse, JSONResponse, HTMLResponse
 from starlette.routing import Route
@@ -7,9 +15,134 @@
 from .auth_backend import AuthBackend, AuthState
 from .session_manager import SessionManager
 from .user_store import UserStore
-from .models import UserRole
+from . import _json
+from .models import UserRole, RolePermissions
 from .middleware import get_current_user
 
+# JSON bodies for the polled status endpoints are assembled from pre-encoded parts
+_JSON_MEDIA_TYPE = "application/json"
+_UNAUTHENTICATED_STATUS_BODY = _json.dumps({"authenticated": False, "user": None})
+_ROLE_PERMISSIONS_JSON = {
+    role: _json.dumps(RolePermissions.get_permission_list_for_role(role))
+    for role in UserRole
+}
+
+# The login page is static apart from the OAuth URL, so it is encoded once up front
+_LOGIN_HTML_TEMPLATE = """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Dagster - Login</title>
+    <style>
+        body {
+            margin: 0;
+            padding: 0;
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+        }
+        .login-container {
+            background: white;
+            border-radius: 12px;
+            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
+            padding: 3rem;
+            text-align: center;
+            max-width: 400px;
+            width: 100%;
+            margin: 2rem;
+        }
+        .logo {
+            width: 80px;
+            height: 80px;
+            margin: 0 auto 2rem;
+            background: linear-gradient(45deg, #3498db, #2980b9);
+            border-radius: 20px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            font-size: 2rem;
+            color: white;
+            font-weight: bold;
+        }
+        h1 {
+            color: #2c3e50;
+            margin-bottom: 0.5rem;
+            font-size: 2rem;
+            font-weight: 600;
+        }
+        .subtitle {
+            color: #7f8c8d;
+            margin-bottom: 2rem;
+            font-size: 1.1rem;
+        }
+        .login-button {
+            background: #333;
+            color: white;
+            border: none;
+            padding: 1rem 2rem;
+            border-radius: 8px;
+            font-size: 1.1rem;
+            text-decoration: none;
+            display: inline-flex;
+            align-items: center;
+            gap: 0.8rem;
+            transition: all 0.3s ease;
+            cursor: pointer;
+            width: 100%;
+            justify-content: center;
+            box-sizing: border-box;
+        }
+        .login-button:hover {
+            background: #555;
+            transform: translateY(-2px);
+            box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
+        }
+        .github-icon {
+            font-size: 1.2rem;
+        }
+        .footer {
+            margin-top: 2rem;
+            color: #95a5a6;
+            font-size: 0.9rem;
+        }
+    </style>
+</head>
+<body>
+    <div class="login-container">
+        <div class="logo">D</div>
+        <h1>Welcome to Dagster</h1>
+        <p class="subtitle">Please sign in to access your data platform</p>
+
+        <a href="{auth_url}" class="login-button">
+            <span class="github-icon">⌘</span>
+            Sign in with GitHub
+        </a>
+
+        <div class="footer">
+            Secure authentication powered by OAuth 2.0
+        </div>
+    </div>
+</body>
+</html>
+"""
+_LOGIN_HTML_PREFIX, _LOGIN_HTML_SUFFIX = (
+    part.encode() for part in _LOGIN_HTML_TEMPLATE.split("{auth_url}")
+)
+
+# The bulk of the page comes before the OAuth URL, so it is gzip-compressed once
+# and each response only compresses the URL and the short remainder. Copying the
+# compressor keeps the output a single gzip stream with a correct checksum.
+_LOGIN_HTML_COMPRESSOR = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+_LOGIN_HTML_PREFIX_GZIP = (
+    _LOGIN_HTML_COMPRESSOR.compress(_LOGIN_HTML_PREFIX)
+    + _LOGIN_HTML_COMPRESSOR.flush(zlib.Z_SYNC_FLUSH)
+)
+
 
 class AuthRoutes:
     """Handles authentication-related routes."""
@@ -28,6 +161,15 @@ def __init__(
         self.default_role = default_role
         self.base_url = base_url
         self.auth_state = AuthState()
+        self.provider_name = (
+            getattr(auth_backend, "provider_name", None)
+            or auth_backend.__class__.__name__.lower().replace("oauthbackend", "")
+        )
+        # Logins in progress keyed by (authorization code, state), so duplicate
+        # callbacks from the same browser share one token exchange and user update.
+        # The state is part of the key so a callback from another browser can't
+        # join someone else's login and receive their session.
+        self._inflight_logins: Dict[Tuple[str, str], "asyncio.Future[str]"] = {}
 
     def get_routes(self) -> list[Route]:
         """Get all authentication routes."""
@@ -54,109 +196,20 @@ async def login_page(self, request: Request) -> Response:
         # Store state in session for validation
         request.session["oauth_state"] = state
 
-        login_html = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Dagster - Login</title>
-            <style>
-                body {{
-                    margin: 0;
-                    padding: 0;
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                }}
-                .login-container {{
-                    background: white;
-                    border-radius: 12px;
-                    box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-                    padding: 3rem;
-                    text-align: center;
-                    max-width: 400px;
-                    width: 100%;
-                    margin: 2rem;
-                }}
-                .logo {{
-                    width: 80px;
-                    height: 80px;
-                    margin: 0 auto 2rem;
-                    background: linear-gradient(45deg, #3498db, #2980b9);
-                    border-radius: 20px;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    font-size: 2rem;
-                    color: white;
-                    font-weight: bold;
-                }}
-                h1 {{
-                    color: #2c3e50;
-                    margin-bottom: 0.5rem;
-                    font-size: 2rem;
-                    font-weight: 600;
-                }}
-                .subtitle {{
-                    color: #7f8c8d;
-                    margin-bottom: 2rem;
-                    font-size: 1.1rem;
-                }}
-                .login-button {{
-                    background: #333;
-                    color: white;
-                    border: none;
-                    padding: 1rem 2rem;
-                    border-radius: 8px;
-                    font-size: 1.1rem;
-                    text-decoration: none;
-                    display: inline-flex;
-                    align-items: center;
-                    gap: 0.8rem;
-                    transition: all 0.3s ease;
-                    cursor: pointer;
-                    width: 100%;
-                    justify-content: center;
-                    box-sizing: border-box;
-                }}
-                .login-button:hover {{
-                    background: #555;
-                    transform: translateY(-2px);
-                    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15);
-                }}
-                .github-icon {{
-                    font-size: 1.2rem;
-                }}
-                .footer {{
-                    margin-top: 2rem;
-                    color: #95a5a6;
-                    font-size: 0.9rem;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="login-container">
-                <div class="logo">D</div>
-                <h1>Welcome to Dagster</h1>
-                <p class="subtitle">Please sign in to access your data platform</p>
-                
-                <a href="{auth_url}" class="login-button">
-                    <span class="github-icon">⌘</span>
-                    Sign in with GitHub
-                </a>
-                
-                <div class="footer">
-                    Secure authentication powered by OAuth 2.0
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        return HTMLResponse(login_html)
+        escaped_auth_url = html.escape(auth_url, quote=True).encode()
+        if "gzip" not in request.headers.get("accept-encoding", ""):
+            return HTMLResponse(
+                _LOGIN_HTML_PREFIX + escaped_auth_url + _LOGIN_HTML_SUFFIX,
+                headers={"Vary": "Accept-Encoding"},
+            )
+
+        compressor = _LOGIN_HTML_COMPRESSOR.copy()
+        return HTMLResponse(
+            _LOGIN_HTML_PREFIX_GZIP
+            + compressor.compress(escaped_auth_url + _LOGIN_HTML_SUFFIX)
+            + compressor.flush(),
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
 
     async def oauth_callback(self, request: Request) -> Response:
         """Handle OAuth callback from provider."""
@@ -170,9 +223,19 @@ async def oauth_callback(self, request: Request) -> Response:
                     {"error": "Missing authorization code or state"}, status_code=400
                 )
 
-            # Validate state to prevent CSRF
+            # Validate state to prevent CSRF by requiring the one issued to this
+            # browser session. The session lives in a client side cookie that can
+            # be replayed, so states are also consumed on the server. A retry that
+            # arrives while the first callback is still running joins its login.
             stored_state = request.session.get("oauth_state")
-            if not stored_state or not self.auth_state.validate_state(state):
+            if (
+                not stored_state
+                or not hmac.compare_digest(stored_state.encode(), state.encode())
+                or not (
+                    self.auth_state.consume_state(state)
+                    or (code, state) in self._inflight_logins
+                )
+            ):
                 return JSONResponse(
                     {"error": "Invalid state parameter"}, status_code=400
                 )
@@ -180,36 +243,7 @@ async def oauth_callback(self, request: Request) -> Response:
             # Clear the stored state
             request.session.pop("oauth_state", None)
 
-            # Exchange code for token
-            token_data = self.auth_backend.exchange_code_for_token(code, state)
-            access_token = token_data["access_token"]
-
-            # Get user info from provider
-            user_info = self.auth_backend.get_user_info(access_token)
-
-            # Check if user already exists
-            provider = self.auth_backend.__class__.__name__.lower().replace(
-                "oauthbackend", ""
-            )
-            existing_user = self.user_store.get_user_by_provider_id(
-                provider, str(user_info["id"])
-            )
-
-            if existing_user:
-                # Update existing user's last login
-                from datetime import datetime
-
-                existing_user.last_login = datetime.now()
-                user = self.user_store.create_or_update_user(existing_user)
-            else:
-                # Create new user
-                user = self.auth_backend.create_user_from_info(
-                    user_info, self.default_role
-                )
-                user = self.user_store.create_or_update_user(user)
-
-            # Create session
-            session_id = self.session_manager.create_session(user)
+            session_id = await self._login_once(code, state)
 
             # Create response with redirect
             redirect_url = self.base_url or "/"
@@ -232,6 +266,46 @@ async def oauth_callback(self, request: Request) -> Response:
                 {"error": f"Authentication failed: {str(e)}"}, status_code=500
             )
 
+    async def _login_once(self, code: str, state: str) -> str:
+        """Complete the login for a code, joining an in-progress login if any."""
+        key = (code, state)
+        login = self._inflight_logins.get(key)
+        if login is None:
+            login = asyncio.ensure_future(self._complete_login(code, state))
+            self._inflight_logins[key] = login
+            login.add_done_callback(lambda _: self._inflight_logins.pop(key, None))
+
+        # Shield the shared login so one client disconnecting doesn't cancel it for
+        # the others
+        return await asyncio.shield(login)
+
+    async def _complete_login(self, code: str, state: str) -> str:
+        """Exchange the code, create or update the user and return a session ID."""
+        # Exchange code for token
+        token_data = await self.auth_backend.exchange_code_for_token_async(code, state)
+        access_token = token_data["access_token"]
+
+        # Get user info from provider
+        user_info = await self.auth_backend.get_user_info_async(access_token)
+
+        # Check if user already exists
+        existing_user = self.user_store.get_user_by_provider_id(
+            self.provider_name, str(user_info["id"])
+        )
+
+        if existing_user:
+            # Update existing user's last login
+            user = self.user_store.create_or_update_user(
+                replace(existing_user, last_login=datetime.now(timezone.utc))
+            )
+        else:
+            # Create new user
+            user = self.auth_backend.create_user_from_info(user_info, self.default_role)
+            user = self.user_store.create_or_update_user(user)
+
+        # Create session
+        return self.session_manager.create_session(user)
+
     async def logout(self, request: Request) -> Response:
         """Handle user logout."""
         # Get session ID and invalidate it
@@ -252,20 +326,22 @@ async def get_current_user_info(self, request: Request) -> Response:
         if not user:
             return JSONResponse({"error": "Not authenticated"}, status_code=401)
 
-        return JSONResponse(
-            {
-                "user": user.to_dict(),
-                "permissions": list(user.permission_checker.get_permissions()),
-            }
+        return Response(
+            b'{"user":'
+            + user.to_json()
+            + b',"permissions":'
+            + _ROLE_PERMISSIONS_JSON[user.role]
+            + b"}",
+            media_type=_JSON_MEDIA_TYPE,
         )
 
     async def auth_status(self, request: Request) -> Response:
         """Get authentication status."""
         user = get_current_user(request)
+        if not user:
+            return Response(_UNAUTHENTICATED_STATUS_BODY, media_type=_JSON_MEDIA_TYPE)
 
-        return JSONResponse(
-            {
-                "authenticated": user is not None,
-                "user": user.to_dict() if user else None,
-            }
+        return Response(
+            b'{"authenticated":true,"user":' + user.to_json() + b"}",
+            media_type=_JSON_MEDIA_TYPE,
         )
@@ -1,126 +1,272 @@
 """Session management for user authentication."""
 
-import time
+import base64
+import binascii
+import heapq
 import secrets
-from typing import Dict, Optional
 import threading
+import time
 from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from .models import User
 
+# Number of session shards; must be a power of two so a shard can be picked with
+# a bitmask
+_SHARD_COUNT = 16
+_SHARD_MASK = _SHARD_COUNT - 1
+
+# Sessions are keyed by raw random bytes; clients get them as unpadded URL-safe
+# base64, which is exactly 32 characters for 24 bytes
+_SESSION_KEY_BYTES = 24
+_SESSION_ID_LENGTH = 32
+
+
+def _encode_session_id(session_key: bytes) -> str:
+    """Return the session ID handed to clients for a session key."""
+    return base64.urlsafe_b64encode(session_key).decode("ascii")
+
+
+def _decode_session_id(session_id: str) -> Optional[bytes]:
+    """Return the session key for a session ID, or None if it is malformed."""
+    if len(session_id) != _SESSION_ID_LENGTH:
+        return None
+    # With altchars the decoder still accepts "+" and "/", which would give a
+    # key several valid session IDs
+    if "+" in session_id or "/" in session_id:
+        return None
+    try:
+        # Strict decoding, so each key has exactly one valid session ID
+        return base64.b64decode(session_id, altchars=b"-_", validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+class _SessionShard:
+    """A lock-protected slice of the session table.
+
+    Sessions are keyed by their raw session key. ``expiry_heap`` is a min-heap of
+    ``(expires_at, session_key)`` entries. Entries may be stale: a session refreshed
+    after its entry was pushed is rescheduled when the entry reaches the top, and
+    removed sessions are simply dropped. ``by_user`` indexes the shard's session
+    keys by username.
+    """
+
+    __slots__ = ("by_user", "expiry_heap", "lock", "sessions")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.sessions: Dict[bytes, Dict] = {}
+        self.expiry_heap: List[Tuple[float, bytes]] = []
+        self.by_user: Dict[str, Set[bytes]] = {}
+
+    def add(self, session_key: bytes, session_data: Dict):
+        """Store a session and index it by username."""
+        self.sessions[session_key] = session_data
+        self.by_user.setdefault(session_data["user"].username, set()).add(session_key)
+
+    def remove(self, session_key: bytes) -> bool:
+        """Remove a session and its index entry, returning whether it existed."""
+        session_data = self.sessions.pop(session_key, None)
+        if session_data is None:
+            return False
+
+        username = session_data["user"].username
+        user_sessions = self.by_user[username]
+        user_sessions.discard(session_key)
+        if not user_sessions:
+            del self.by_user[username]
+        return True
+
 
 class SessionManager:
-    """Manages user sessions and authentication state."""
+    """Manages user sessions and authentication state.
+
+    Expiry is tracked with the monotonic clock, so it is unaffected by changes to
+    the system time.
+    """
 
     def __init__(self, session_timeout: int = 3600 * 24):  # 24 hours default
         self.session_timeout = session_timeout
-        self._sessions: Dict[str, Dict] = {}
-        self._lock = threading.RLock()
+        # Sessions are split across independently locked shards so concurrent
+        # requests for different sessions don't contend on a single lock
+        self._shards = [_SessionShard() for _ in range(_SHARD_COUNT)]
+        self._invalidation_listeners: List[Callable[[str], None]] = []
+
+    def _shard(self, session_key: bytes) -> _SessionShard:
+        """Return the shard responsible for a session key."""
+        return self._shards[hash(session_key) & _SHARD_MASK]
+
+    def add_invalidation_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the ID of every removed session."""
+        self._invalidation_listeners.append(listener)
+
+    def _notify_invalidated(self, session_keys: Iterable[bytes]):
+        """Notify listeners that sessions were removed."""
+        for session_key in session_keys:
+            session_id = _encode_session_id(session_key)
+            for listener in self._invalidation_listeners:
+                listener(session_id)
 
     def create_session(self, user: User) -> str:
         """Create a new session for a user."""
-        with self._lock:
-            session_id = secrets.token_urlsafe(32)
-            self._sessions[session_id] = {
-                "user": user,
-                "created_at": time.time(),
-                "last_accessed": time.time(),
-            }
-            return session_id
+        session_key = secrets.token_bytes(_SESSION_KEY_BYTES)
+        now = time.monotonic()
+        shard = self._shard(session_key)
+        with shard.lock:
+            shard.add(
+                session_key,
+                {
+                    "user": user,
+                    # Wall clock time, only used for display
+                    "created_at": time.time(),
+                    "last_accessed": now,
+                },
+            )
+            heapq.heappush(shard.expiry_heap, (now + self.session_timeout, session_key))
+        return _encode_session_id(session_key)
 
     def get_user_from_session(self, session_id: str) -> Optional[User]:
         """Get user from session ID, checking validity."""
-        with self._lock:
-            if session_id not in self._sessions:
+        session_key = _decode_session_id(session_id)
+        if session_key is None:
+            return None
+
+        shard = self._shard(session_key)
+        with shard.lock:
+            session_data = shard.sessions.get(session_key)
+            if session_data is None:
                 return None
 
-            session_data = self._sessions[session_id]
-            current_time = time.time()
+            current_time = time.monotonic()
 
             # Check if session has expired
             if current_time - session_data["last_accessed"] > self.session_timeout:
-                del self._sessions[session_id]
+                shard.remove(session_key)
+                self._notify_invalidated([session_key])
                 return None
 
-            # Update last accessed time
+            # Update last accessed time, the expiry heap entry is rescheduled
+            # lazily during cleanup
             session_data["last_accessed"] = current_time
             return session_data["user"]
 
     def invalidate_session(self, session_id: str) -> bool:
         """Invalidate a session."""
-        with self._lock:
-            if session_id in self._sessions:
-                del self._sessions[session_id]
+        session_key = _decode_session_id(session_id)
+        if session_key is None:
+            return False
+
+        shard = self._shard(session_key)
+        with shard.lock:
+            if shard.remove(session_key):
+                self._notify_invalidated([session_key])
                 return True
         return False
 
     def invalidate_all_user_sessions(self, username: str):
         """Invalidate all sessions for a specific user."""
-        with self._lock:
-            sessions_to_remove = []
-            for session_id, session_data in self._sessions.items():
-                if session_data["user"].username == username:
-                    sessions_to_remove.append(session_id)
-
-            for session_id in sessions_to_remove:
-                del self._sessions[session_id]
+        for shard in self._shards:
+            with shard.lock:
+                sessions_to_remove = shard.by_user.pop(username, ())
+                for session_key in sessions_to_remove:
+                    del shard.sessions[session_key]
+                self._notify_invalidated(sessions_to_remove)
 
     def cleanup_expired_sessions(self):
-        """Remove expired sessions."""
-        with self._lock:
-            current_time = time.time()
-            expired_sessions = []
+        """Remove expired sessions.
+
+        Only heap entries that are due are examined, so the cost is proportional
+        to the number of sessions that expired or were refreshed since the last
+        cleanup rather than to the total number of sessions.
+        """
+        current_time = time.monotonic()
+        # Only one shard is locked at a time so lookups in the other shards
+        # proceed while cleanup runs
+        for shard in self._shards:
+            with shard.lock:
+                heap = shard.expiry_heap
+                expired_sessions = []
+
+                while heap and heap[0][0] <= current_time:
+                    _, session_key = heapq.heappop(heap)
+                    session_data = shard.sessions.get(session_key)
+                    if session_data is None:
+                        # Session was already removed
+                        continue
 
-            for session_id, session_data in self._sessions.items():
-                if current_time - session_data["last_accessed"] > self.session_timeout:
-                    expired_sessions.append(session_id)
+                    # Must use the same comparison as the loop condition, otherwise
+                    # an entry due exactly now would be pushed back and popped
+                    # again forever
+                    expires_at = session_data["last_accessed"] + self.session_timeout
+                    if expires_at <= current_time:
+                        shard.remove(session_key)
+                        expired_sessions.append(session_key)
+                    else:
+                        # Session was refreshed since this entry was pushed
+                        heapq.heappush(heap, (expires_at, session_key))
 
-            for session_id in expired_sessions:
-                del self._sessions[session_id]
+                self._notify_invalidated(expired_sessions)
 
     def get_active_session_count(self) -> int:
-        """Get count of active sessions."""
-        with self._lock:
-            self.cleanup_expired_sessions()
-            return len(self._sessions)
+        """Get count of active sessions.
+
+        Sessions that expired since the last cleanup are included until they are
+        looked up or swept.
+        """
+        return sum(len(shard.sessions) for shard in self._shards)
 
     def get_user_session_count(self, username: str) -> int:
         """Get count of active sessions for a user."""
-        with self._lock:
-            self.cleanup_expired_sessions()
-            count = 0
-            for session_data in self._sessions.values():
-                if session_data["user"].username == username:
-                    count += 1
-            return count
+        current_time = time.monotonic()
+        count = 0
+        for shard in self._shards:
+            with shard.lock:
+                for session_key in shard.by_user.get(username, ()):
+                    last_accessed = shard.sessions[session_key]["last_accessed"]
+                    if current_time - last_accessed <= self.session_timeout:
+                        count += 1
+        return count
 
     def refresh_session(self, session_id: str) -> bool:
         """Refresh a session's last accessed time."""
-        with self._lock:
-            if session_id in self._sessions:
-                self._sessions[session_id]["last_accessed"] = time.time()
+        session_key = _decode_session_id(session_id)
+        if session_key is None:
+            return False
+
+        shard = self._shard(session_key)
+        with shard.lock:
+            session_data = shard.sessions.get(session_key)
+            if session_data is not None:
+                session_data["last_accessed"] = time.monotonic()
                 return True
         return False
 
     def get_session_info(self, session_id: str) -> Optional[Dict]:
         """Get session information."""
-        with self._lock:
-            if session_id not in self._sessions:
+        session_key = _decode_session_id(session_id)
+        if session_key is None:
+            return None
+
+        shard = self._shard(session_key)
+        with shard.lock:
+            session_data = shard.sessions.get(session_key)
+            if session_data is None:
                 return None
 
-            session_data = self._sessions[session_id]
-            current_time = time.time()
+            current_time = time.monotonic()
 
             # Check if session has expired
             if current_time - session_data["last_accessed"] > self.session_timeout:
-                del self._sessions[session_id]
+                shard.remove(session_key)
+                self._notify_invalidated([session_key])
                 return None
 
+            # Access times are monotonic, convert them to wall clock for display
+            last_accessed = time.time() - (current_time - session_data["last_accessed"])
             return {
                 "user": session_data["user"],
                 "created_at": datetime.fromtimestamp(session_data["created_at"]),
-                "last_accessed": datetime.fromtimestamp(session_data["last_accessed"]),
-                "expires_at": datetime.fromtimestamp(
-                    session_data["last_accessed"] + self.session_timeout
-                ),
+                "last_accessed": datetime.fromtimestamp(last_accessed),
+                "expires_at": datetime.fromtimestamp(last_accessed + self.session_timeout),
             }
@@ -1,100 +1,361 @@
 """User storage and management."""
 
-import json
-from typing import Dict, List, Optional
+import atexit
+import contextlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import replace
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 import threading
 
+from . import _json
 from .models import User, UserRole
 
 
+class _RWLock:
+    """A lock that lets readers share access while writers get exclusive access.
+
+    Waiting writers block new readers so a steady stream of reads can't starve
+    writes. The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextlib.contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writing or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
 class UserStore:
-    """Stores and manages user data and role assignments."""
+    """Stores and manages user data and role assignments.
+
+    Users are persisted as a JSON snapshot plus an append-only change log next to
+    it. Mutations are queued and a background thread appends them to the log
+    shortly afterwards, so bursts of changes are coalesced into one write. Once
+    the log grows well beyond the number of users it is compacted into a new
+    snapshot. Log entries carry increasing sequence numbers and the snapshot
+    records the last one it covers, so entries left behind by an interrupted
+    compaction are skipped on load.
+    """
+
+    # Seconds to wait after a mutation before writing, to batch further changes
+    FLUSH_DELAY = 0.2
+    # Compact once the log holds this many entries per stored user
+    COMPACTION_FACTOR = 4
 
     def __init__(
         self, storage_path: str, role_assignments: Optional[Dict[str, str]] = None
     ):
         self.storage_path = Path(storage_path)
+        self.log_path = self.storage_path.with_suffix(".log")
         self.role_assignments = role_assignments or {}
         self._users: Dict[str, User] = {}
-        self._lock = threading.RLock()
+        # Lookup indexes mapping email and (provider, provider_id) to usernames.
+        # Neither is guaranteed to be unique, e.g. providers may return no email.
+        self._usernames_by_email: Dict[Optional[str], Set[str]] = {}
+        self._usernames_by_provider_id: Dict[Tuple[str, str], Set[str]] = {}
+        # Live per-role user counts, kept in sync with the indexes
+        self._role_counts: Dict[UserRole, int] = {role: 0 for role in UserRole}
+        self._lock = _RWLock()
+        self._change_listeners: List[Callable[[str], None]] = []
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._closed = False
+        # Changes not yet written to the log, as (username, user or None) pairs
+        self._pending_changes: List[Tuple[str, Optional[User]]] = []
+        self._log_entries = 0
+        # Sequence number of the last change written to the log or snapshot
+        self._seq = 0
+        self._needs_compaction = False
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         self._load_users()
+        self._log_fp = open(self.log_path, "ab")
+
+        self._flush_thread = threading.Thread(
+            target=self._flush_loop, name="dagster-auth-user-store", daemon=True
+        )
+        self._flush_thread.start()
+        atexit.register(self.close)
 
     def _load_users(self):
-        """Load users from storage file."""
+        """Load users from the storage snapshot and replay the change log."""
         if self.storage_path.exists():
             try:
-                with open(self.storage_path, "r") as f:
-                    users_data = json.load(f)
-                    for username, user_data in users_data.items():
-                        self._users[username] = User.from_dict(user_data)
-            except (json.JSONDecodeError, FileNotFoundError, KeyError):
+                with open(self.storage_path, "rb") as f:
+                    data = _json.loads(f.read())
+                # Snapshots written before sequence numbers were added are a
+                # plain mapping of usernames to users
+                if isinstance(data.get("seq"), int):
+                    self._seq = data["seq"]
+                    users_data = data["users"]
+                else:
+                    users_data = data
+                for username, user_data in users_data.items():
+                    self._users[username] = User.from_dict(user_data)
+            # ValueError covers JSON decoding errors from either JSON library
+            except (ValueError, FileNotFoundError, KeyError):
                 self._users = {}
 
-    def _save_users(self):
-        """Save users to storage file."""
-        users_data = {
-            username: user.to_dict() for username, user in self._users.items()
-        }
-        with open(self.storage_path, "w") as f:
-            json.dump(users_data, f, indent=2)
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = _json.loads(line)
+                        if entry["seq"] <= self._seq:
+                            # Already in the snapshot, left behind by a compaction
+                            # that was interrupted before truncating the log
+                            self._needs_compaction = True
+                            continue
+                        self._seq = entry["seq"]
+                        if entry["op"] == "upsert":
+                            user = User.from_dict(entry["user"])
+                            self._users[user.username] = user
+                        else:
+                            self._users.pop(entry["username"], None)
+                    except (ValueError, KeyError):
+                        # A partially written entry, rewrite a clean snapshot
+                        self._needs_compaction = True
+                        continue
+                    self._log_entries += 1
+
+        for user in self._users.values():
+            self._index_user(user)
+
+    def _index_user(self, user: User):
+        """Add a user to the lookup indexes."""
+        self._role_counts[user.role] += 1
+        self._usernames_by_email.setdefault(user.email, set()).add(user.username)
+        self._usernames_by_provider_id.setdefault(
+            (user.provider, user.provider_id), set()
+        ).add(user.username)
+
+    def _unindex_user(self, user: User):
+        """Remove a user from the lookup indexes."""
+        self._role_counts[user.role] -= 1
+        _discard_from_index(self._usernames_by_email, user.email, user.username)
+        _discard_from_index(
+            self._usernames_by_provider_id,
+            (user.provider, user.provider_id),
+            user.username,
+        )
+
+    def _first_user(self, usernames: Optional[Set[str]]) -> Optional[User]:
+        """Return the first stored user out of an index entry."""
+        if not usernames:
+            return None
+        if len(usernames) == 1:
+            return self._users[next(iter(usernames))]
+        # Rare duplicates resolve to the earliest stored user, as a full scan would
+        return next(user for user in self._users.values() if user.username in usernames)
+
+    def _set_user(self, user: User):
+        """Store a user, keeping the lookup indexes in sync."""
+        existing_user = self._users.get(user.username)
+        if existing_user is not None:
+            self._unindex_user(existing_user)
+        self._users[user.username] = user
+        self._index_user(user)
+        self._save_user(user.username)
+        self._notify_changed(user.username)
+
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the username of every changed user.
+
+        Listeners are called while the store is locked, so they must not call back
+        into the store.
+        """
+        self._change_listeners.append(listener)
+
+    def _notify_changed(self, username: str):
+        """Notify listeners that a user was updated or deleted."""
+        for listener in self._change_listeners:
+            listener(username)
+
+    def _save_user(self, username: str):
+        """Schedule the current state of a user to be written to storage."""
+        self._pending_changes.append((username, self._users.get(username)))
+        self._dirty.set()
+
+    def _flush_loop(self):
+        """Write pending changes in the background until the store is closed."""
+        while not self._closed:
+            self._dirty.wait()
+            if self._closed:
+                return
+            time.sleep(self.FLUSH_DELAY)
+            self._dirty.clear()
+            try:
+                self.flush()
+            except Exception:
+                logging.getLogger("dagster.webserver").exception(
+                    "Failed to save authentication users"
+                )
+
+    def flush(self):
+        """Write pending changes to storage."""
+        with self._flush_lock:
+            # Only the snapshot is taken under the store lock, readers and writers
+            # are not blocked while the file is written
+            with self._lock.write():
+                changes, self._pending_changes = self._pending_changes, []
+                # Set when compacting, to the snapshot that replaces the log
+                users_data: Optional[Dict[str, Dict]] = None
+                if self._needs_compaction or (
+                    self._log_entries + len(changes)
+                    > self.COMPACTION_FACTOR * max(len(self._users), 1)
+                ):
+                    users_data = {
+                        username: user.to_dict()
+                        for username, user in self._users.items()
+                    }
+
+            try:
+                if users_data is not None:
+                    self._write_snapshot(users_data)
+                elif changes:
+                    self._append_changes(changes)
+            except BaseException:
+                # The log may now end with a partial entry, the next flush writes
+                # a snapshot that covers these changes instead
+                self._needs_compaction = True
+                raise
+
+    def _append_changes(self, changes: List[Tuple[str, Optional[User]]]):
+        """Append changes to the log file."""
+        lines = [
+            _json.dumps({"seq": seq, "op": "upsert", "user": user.to_dict()})
+            if user
+            else _json.dumps({"seq": seq, "op": "delete", "username": username})
+            for seq, (username, user) in enumerate(changes, self._seq + 1)
+        ]
+        self._log_fp.write(b"\n".join(lines) + b"\n")
+        self._log_fp.flush()
+        os.fsync(self._log_fp.fileno())
+        self._log_entries += len(lines)
+        self._seq += len(lines)
+
+    def _write_snapshot(self, users_data: Dict[str, Dict]):
+        """Atomically replace the snapshot file and truncate the log."""
+        # The snapshot also covers pending changes that never reach the log, so it
+        # gets its own sequence number that is newer than every logged entry
+        self._seq += 1
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.storage_path.parent, prefix=f".{self.storage_path.name}."
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_json.dumps({"seq": self._seq, "users": users_data}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.storage_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+        # Entries still in the log are older than the snapshot and skipped on
+        # load, so a crash before the truncation does not roll back any changes
+        self._log_fp.truncate(0)
+        self._log_entries = 0
+        self._needs_compaction = False
+
+    def close(self):
+        """Write pending changes and stop the background writer."""
+        if self._closed:
+            return
+        self._closed = True
+        self._dirty.set()
+        self._flush_thread.join()
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        finally:
+            self._log_fp.close()
 
     def get_user(self, username: str) -> Optional[User]:
         """Get user by username."""
-        with self._lock:
+        with self._lock.read():
             return self._users.get(username)
 
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email."""
-        with self._lock:
-            for user in self._users.values():
-                if user.email == email:
-                    return user
-        return None
+        with self._lock.read():
+            return self._first_user(self._usernames_by_email.get(email))
 
     def get_user_by_provider_id(
         self, provider: str, provider_id: str
     ) -> Optional[User]:
         """Get user by provider and provider ID."""
-        with self._lock:
-            for user in self._users.values():
-                if user.provider == provider and user.provider_id == provider_id:
-                    return user
-        return None
+        with self._lock.read():
+            return self._first_user(
+                self._usernames_by_provider_id.get((provider, provider_id))
+            )
 
     def create_or_update_user(self, user: User) -> User:
         """Create a new user or update existing user."""
-        with self._lock:
+        with self._lock.write():
             # Check if user should have a specific role assignment
             assigned_role = self._get_assigned_role(user.username, user.email)
             if assigned_role:
-                user.role = assigned_role
+                user = replace(user, role=assigned_role)
 
-            self._users[user.username] = user
-            self._save_users()
+            self._set_user(user)
             return user
 
     def update_user_role(self, username: str, role: UserRole) -> bool:
         """Update user's role."""
-        with self._lock:
+        with self._lock.write():
             if username in self._users:
-                self._users[username].role = role
-                self._save_users()
+                self._set_user(replace(self._users[username], role=role))
                 return True
         return False
 
     def list_users(self) -> List[User]:
         """List all users."""
-        with self._lock:
+        with self._lock.read():
             return list(self._users.values())
 
     def delete_user(self, username: str) -> bool:
         """Delete a user."""
-        with self._lock:
+        with self._lock.write():
             if username in self._users:
-                del self._users[username]
-                self._save_users()
+                self._unindex_user(self._users.pop(username))
+                self._save_user(username)
+                self._notify_changed(username)
                 return True
         return False
 
@@ -112,26 +373,30 @@ def _get_assigned_role(self, username: str, email: str) -> Optional[UserRole]:
 
     def update_role_assignments(self, role_assignments: Dict[str, str]):
         """Update role assignments configuration."""
-        with self._lock:
+        with self._lock.write():
             self.role_assignments = role_assignments
 
             # Update existing users with new role assignments
-            for user in self._users.values():
+            for user in list(self._users.values()):
                 assigned_role = self._get_assigned_role(user.username, user.email)
-                if assigned_role:
-                    user.role = assigned_role
-
-            self._save_users()
+                if assigned_role and assigned_role != user.role:
+                    self._set_user(replace(user, role=assigned_role))
 
     def get_users_with_role(self, role: UserRole) -> List[User]:
         """Get all users with a specific role."""
-        with self._lock:
+        with self._lock.read():
             return [user for user in self._users.values() if user.role == role]
 
     def count_users_by_role(self) -> Dict[UserRole, int]:
         """Count users by role."""
-        with self._lock:
-            counts = {role: 0 for role in UserRole}
-            for user in self._users.values():
-                counts[user.role] += 1
-            return counts
+        with self._lock.read():
+            return dict(self._role_counts)
+
+
+def _discard_from_index(index: Dict, key, username: str):
+    """Remove a username from an index entry, dropping the entry once empty."""
+    usernames = index.get(key)
+    if usernames is not None:
+        usernames.discard(username)
+        if not usernames:
+            del index[key]
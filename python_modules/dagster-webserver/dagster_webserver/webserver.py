@@ -5,7 +5,7 @@
 import secrets
 import os
 from os import path, walk
-from typing import Generic, Optional, TypeVar
+from typing import TYPE_CHECKING, Generic, Optional, TypeVar
 
 import dagster._check as check
 from dagster import __version__ as dagster_version
@@ -26,6 +26,7 @@
 from dagster_graphql.schema import create_schema
 from dagster_shared.seven import json
 from graphene import Schema
+from starlette.applications import Starlette
 from starlette.datastructures import MutableHeaders
 from starlette.exceptions import HTTPException
 from starlette.middleware import Middleware
@@ -49,8 +50,9 @@
 )
 from dagster_webserver.graphql import GraphQLServer
 from dagster_webserver.version import __version__
-from dagster_webserver.auth import AuthManager, AuthenticatedWorkspaceRequestContext
-from dagster_webserver.auth.middleware import get_current_user
+
+if TYPE_CHECKING:
+    from dagster_webserver.auth import AuthManager
 
 mimetypes.init()
 
@@ -72,12 +74,26 @@ def __init__(
         app_path_prefix: str = "",
         live_data_poll_rate: Optional[int] = None,
         uses_app_path_prefix: bool = True,
-        auth_manager: Optional[AuthManager] = None,
+        auth_manager: Optional["AuthManager"] = None,
     ):
         self._process_context = process_context
         self._live_data_poll_rate = live_data_poll_rate
         self._uses_app_path_prefix = uses_app_path_prefix
         self._auth_manager = auth_manager
+        if auth_manager:
+            # Imported once here rather than per request, the auth package is only
+            # loaded when authentication is enabled
+            from dagster_webserver.auth.context import AuthenticatedWorkspaceRequestContext
+            from dagster_webserver.auth.middleware import (
+                AuthenticationMiddleware,
+                get_current_user,
+            )
+            from dagster_webserver.auth.permissions import PermissionGuard
+
+            self._auth_context_class = AuthenticatedWorkspaceRequestContext
+            self._get_current_user = get_current_user
+            self._auth_middleware_class = AuthenticationMiddleware
+            self._permission_guard_class = PermissionGuard
         super().__init__(app_path_prefix)
 
     def build_graphql_schema(self) -> Schema:
@@ -94,8 +110,8 @@ def make_request_context(self, conn: HTTPConnection) -> BaseWorkspaceRequestCont
 
         # If authentication is enabled, wrap with authenticated context
         if self._auth_manager:
-            user = get_current_user(conn) if hasattr(conn, "state") else None
-            return AuthenticatedWorkspaceRequestContext(
+            user = self._get_current_user(conn) if hasattr(conn, "state") else None
+            return self._auth_context_class(
                 instance=base_context.instance,
                 current_workspace=base_context.get_current_workspace(),
                 process_context=base_context.process_context,
@@ -124,15 +140,30 @@ def build_middleware(self) -> list[Middleware]:
             ),
         ]
 
-        if self._auth_manager:
-            auth_middleware = self._auth_manager.get_middleware()
-            # Set the app reference for the middleware
-            middleware.append(
-                Middleware(type(auth_middleware), **auth_middleware.__dict__)
-            )
-
         return middleware
 
+    def build_auth_middleware(self) -> list[Middleware]:
+        if not self._auth_manager:
+            return []
+
+        return [
+            Middleware(
+                self._auth_middleware_class,
+                **self._auth_manager.get_middleware_options(),
+            ),
+            # Inside the authentication middleware, which resolves the user
+            Middleware(
+                self._permission_guard_class,
+                **self._auth_manager.get_permission_guard_options(),
+            ),
+        ]
+
+    def create_asgi_app(self, **kwargs) -> Starlette:
+        if self._auth_manager:
+            # Expired auth state is swept in the background for the app's lifetime
+            kwargs["lifespan"] = self._auth_manager.wrap_lifespan(kwargs.get("lifespan"))
+        return super().create_asgi_app(**kwargs)
+
     def make_security_headers(self) -> dict:
         return {
             "Cache-Control": "no-store",
@@ -367,46 +398,56 @@ def build_routes(self):
         if self._auth_manager:
             base_routes.extend(self._auth_manager.get_auth_routes())
 
-        routes = (
-            base_routes
-            + self.build_static_routes()
-            + [
-                # download file endpoints
-                Route(
-                    "/logs/{path:path}",
-                    self.download_captured_logs_endpoint,
-                ),
-                Route(
-                    "/notebook",
-                    self.download_notebook,
-                ),
-                Route(
-                    "/dagit/notebook",
-                    self.download_notebook,
-                ),
-                Route(
-                    "/download_debug/{run_id:str}",
-                    self.download_debug_file_endpoint,
-                ),
-                Route(
-                    "/report_asset_materialization/{asset_key:path}",
-                    self.report_asset_materialization_endpoint,
-                    methods=["POST"],
-                ),
-                Route(
-                    "/report_asset_check/{asset_key:path}",
-                    self.report_asset_check_endpoint,
-                    methods=["POST"],
-                ),
-                Route(
-                    "/report_asset_observation/{asset_key:path}",
-                    self.report_asset_observation_endpoint,
-                    methods=["POST"],
-                ),
-                Route("/{path:path}", self.index_html_endpoint),
-                Route("/", self.index_html_endpoint),
+        static_routes = self.build_static_routes()
+        endpoint_routes = [
+            # download file endpoints
+            Route(
+                "/logs/{path:path}",
+                self.download_captured_logs_endpoint,
+            ),
+            Route(
+                "/notebook",
+                self.download_notebook,
+            ),
+            Route(
+                "/dagit/notebook",
+                self.download_notebook,
+            ),
+            Route(
+                "/download_debug/{run_id:str}",
+                self.download_debug_file_endpoint,
+            ),
+            Route(
+                "/report_asset_materialization/{asset_key:path}",
+                self.report_asset_materialization_endpoint,
+                methods=["POST"],
+            ),
+            Route(
+                "/report_asset_check/{asset_key:path}",
+                self.report_asset_check_endpoint,
+                methods=["POST"],
+            ),
+            Route(
+                "/report_asset_observation/{asset_key:path}",
+                self.report_asset_observation_endpoint,
+                methods=["POST"],
+            ),
+            Route("/{path:path}", self.index_html_endpoint),
+            Route("/", self.index_html_endpoint),
+        ]
+
+        if self._auth_manager:
+            # Static assets are matched ahead of the authenticated routes, so they are
+            # served without passing through the authentication middleware at all
+            routes = static_routes + [
+                Mount(
+                    "",
+                    routes=base_routes + endpoint_routes,
+                    middleware=self.build_auth_middleware(),
+                )
             ]
-        )
+        else:
+            routes = base_routes + static_routes + endpoint_routes
 
         if self._app_path_prefix:
 
@@ -0,0 +1,25 @@
+import pytest
+from dagster_webserver.auth.auth_manager import AuthManager
+
+
+def _auth_config(**overrides):
+    return {
+        "github": {
+            "client_id": "client-id",
+            "client_secret": "client-secret",
+            "redirect_uri": "http://localhost/auth/callback",
+        },
+        **overrides,
+    }
+
+
+def test_cleanup_interval_defaults_to_a_minute(tmp_path):
+    manager = AuthManager(_auth_config(), tmp_path)
+    assert manager.cleanup_interval == 60
+    manager.cleanup()
+
+
+@pytest.mark.parametrize("cleanup_interval", [0, -1])
+def test_non_positive_cleanup_interval_is_rejected(tmp_path, cleanup_interval):
+    with pytest.raises(ValueError, match="cleanup_interval must be positive"):
+        AuthManager(_auth_config(cleanup_interval=cleanup_interval), tmp_path)
@@ -0,0 +1,162 @@
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+from dagster_webserver.auth.middleware import AuthenticationMiddleware
+from dagster_webserver.auth.models import User, UserRole
+from dagster_webserver.auth.session_manager import SessionManager
+from dagster_webserver.auth.user_store import UserStore
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+
+async def _endpoint(request):
+    user = request.scope.get("state", {}).get("user")
+    return PlainTextResponse(user.username if user else "anonymous")
+
+
+@pytest.fixture
+def user_store(tmp_path):
+    store = UserStore(str(tmp_path / "users.json"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def session_manager():
+    return SessionManager()
+
+
+@pytest.fixture
+def client(session_manager, user_store):
+    app = Starlette(
+        routes=[Route("/{path:path}", _endpoint, methods=["GET", "POST"])],
+        middleware=[
+            Middleware(
+                AuthenticationMiddleware,
+                session_manager=session_manager,
+                user_store=user_store,
+            )
+        ],
+    )
+    return TestClient(app, follow_redirects=False)
+
+
+def _make_user(username, role=UserRole.VIEWER):
+    now = datetime.now(timezone.utc)
+    return User(
+        username=username,
+        email=f"{username}@example.com",
+        full_name=None,
+        role=role,
+        provider="github",
+        provider_id=username,
+        created_at=now,
+        last_login=now,
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/auth/login",
+        "/server_info",
+        "/favicon.ico",
+        "/static/app.js",
+        "/vendor/lib.css",
+    ],
+)
+def test_public_paths_skip_authentication(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.text == "anonymous"
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [
+        ("POST", "/report_asset_materialization/foo.js"),
+        ("POST", "/report_asset_check/foo.css"),
+        ("GET", "/logs/a/b.png"),
+        ("GET", "/runs/static/x"),
+        ("GET", "/assets/my_asset.svg"),
+    ],
+)
+def test_dynamic_paths_with_static_looking_names_require_authentication(client, method, path):
+    response = client.request(method, path)
+    assert response.status_code == 302
+    assert response.headers["location"] == "/auth/login"
+
+
+def test_api_paths_return_401(client):
+    assert client.post("/graphql").status_code == 401
+    assert client.get("/runs", headers={"accept": "application/json"}).status_code == 401
+
+
+def test_session_cookie_authenticates(client, session_manager, user_store):
+    user = user_store.create_or_update_user(_make_user("alice"))
+    session_id = session_manager.create_session(user)
+
+    client.cookies.set("dagster_session_id", session_id)
+    response = client.get("/runs")
+    assert response.status_code == 200
+    assert response.text == "alice"
+
+
+def test_invalidated_session_is_rejected(client, session_manager, user_store):
+    user = user_store.create_or_update_user(_make_user("alice"))
+    session_id = session_manager.create_session(user)
+    client.cookies.set("dagster_session_id", session_id)
+    assert client.get("/runs").status_code == 200
+
+    session_manager.invalidate_session(session_id)
+    assert client.get("/runs").status_code == 302
+
+
+def test_user_changes_apply_to_cached_sessions(client, session_manager, user_store):
+    user = user_store.create_or_update_user(_make_user("alice"))
+    session_id = session_manager.create_session(user)
+    client.cookies.set("dagster_session_id", session_id)
+    assert client.get("/runs").status_code == 200
+
+    user_store.create_or_update_user(replace(user, is_active=False))
+    assert client.get("/runs").status_code == 302
+
+
+def test_deleted_user_is_rejected(client, session_manager, user_store):
+    user = user_store.create_or_update_user(_make_user("alice"))
+    client.cookies.set("dagster_session_id", session_manager.create_session(user))
+    assert client.get("/runs").status_code == 200
+
+    user_store.delete_user("alice")
+    assert client.get("/runs").status_code == 302
+
+
+def test_role_change_applies_to_cached_sessions(session_manager, user_store):
+    seen_roles = []
+
+    async def record_role(request):
+        seen_roles.append(request.scope["state"]["user"].role)
+        return PlainTextResponse("ok")
+
+    app = Starlette(
+        routes=[Route("/runs", record_role)],
+        middleware=[
+            Middleware(
+                AuthenticationMiddleware,
+                session_manager=session_manager,
+                user_store=user_store,
+            )
+        ],
+    )
+    client = TestClient(app)
+    user = user_store.create_or_update_user(_make_user("alice"))
+    client.cookies.set("dagster_session_id", session_manager.create_session(user))
+
+    client.get("/runs")
+    user_store.update_user_role("alice", UserRole.ADMIN)
+    client.get("/runs")
+    assert seen_roles == [UserRole.VIEWER, UserRole.ADMIN]
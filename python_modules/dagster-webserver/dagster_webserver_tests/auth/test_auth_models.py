@@ -0,0 +1,56 @@
+import copy
+import dataclasses
+import pickle
+from datetime import datetime, timezone
+
+from dagster_webserver.auth.models import User, UserRole
+
+
+def _make_user():
+    now = datetime.now(timezone.utc)
+    return User(
+        username="alice",
+        email="alice@example.com",
+        full_name="Alice",
+        role=UserRole.EDITOR,
+        provider="github",
+        provider_id="1",
+        created_at=now,
+        last_login=now,
+    )
+
+
+def test_user_tags():
+    user = _make_user()
+    assert dict(user.viewer_tags) == {
+        "dagster.user.username": "alice",
+        "dagster.user.email": "alice@example.com",
+        "dagster.user.role": "editor",
+        "dagster.user.provider": "github",
+    }
+    assert dict(user.reporting_user_tags) == {
+        "user": "alice",
+        "user_email": "alice@example.com",
+        "user_role": "editor",
+    }
+    assert (
+        dict(dataclasses.replace(user, role=UserRole.ADMIN).viewer_tags)["dagster.user.role"]
+        == "admin"
+    )
+
+
+def test_user_can_be_pickled_and_copied():
+    user = _make_user()
+    user.to_json()
+
+    for restored in [pickle.loads(pickle.dumps(user)), copy.deepcopy(user)]:
+        assert restored == user
+        assert restored.viewer_tags == user.viewer_tags
+        assert restored.to_json() == user.to_json()
+
+    assert dataclasses.asdict(user)["username"] == "alice"
+
+
+def test_user_round_trips_through_dict():
+    user = _make_user()
+    assert User.from_dict(user.to_dict()) == user
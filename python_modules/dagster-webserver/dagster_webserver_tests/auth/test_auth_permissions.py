@@ -0,0 +1,147 @@
+from datetime import datetime, timezone
+
+import pytest
+from dagster_webserver.auth.models import User, UserRole
+from dagster_webserver.auth.permissions import (
+    DEFAULT_ROUTE_PERMISSIONS,
+    Permission,
+    PermissionChecker,
+    PermissionGuard,
+    has_permission,
+    require_permission,
+)
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+
+def _make_user(role, is_active=True):
+    now = datetime.now(timezone.utc)
+    return User(
+        username="alice",
+        email="alice@example.com",
+        full_name=None,
+        role=role,
+        provider="github",
+        provider_id="1",
+        created_at=now,
+        last_login=now,
+        is_active=is_active,
+    )
+
+
+class _SetUser:
+    def __init__(self, app, user):
+        self.app = app
+        self.user = user
+
+    async def __call__(self, scope, receive, send):
+        scope.setdefault("state", {})["user"] = self.user
+        await self.app(scope, receive, send)
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+@require_permission(Permission.LAUNCH_RUNS)
+async def _launch(request):
+    return PlainTextResponse("ok")
+
+
+def _client(user, route_permissions=DEFAULT_ROUTE_PERMISSIONS):
+    app = Starlette(
+        routes=[
+            Route("/launch", _launch),
+            Route("/{path:path}", _ok, methods=["GET", "POST"]),
+        ],
+        middleware=[
+            Middleware(_SetUser, user=user),
+            Middleware(PermissionGuard, route_permissions=route_permissions),
+        ],
+    )
+    return TestClient(app)
+
+
+def test_role_permissions():
+    assert has_permission(_make_user(UserRole.VIEWER), Permission.VIEW_RUNS)
+    assert not has_permission(_make_user(UserRole.VIEWER), Permission.LAUNCH_RUNS)
+    assert has_permission(_make_user(UserRole.ADMIN), Permission.LAUNCH_RUNS)
+    assert not has_permission(_make_user(UserRole.ADMIN, is_active=False), Permission.VIEW_RUNS)
+    assert not has_permission(None, Permission.VIEW_RUNS)
+
+    checker = PermissionChecker(_make_user(UserRole.EDITOR))
+    assert checker.can_manage_schedules()
+    assert not checker.can_manage_users()
+
+
+@pytest.mark.parametrize(
+    "role, method, path, status_code",
+    [
+        (UserRole.VIEWER, "GET", "/logs/run_id/compute_logs/stdout", 200),
+        (UserRole.VIEWER, "GET", "/download_debug/run_id", 200),
+        (UserRole.VIEWER, "POST", "/report_asset_materialization/my/asset", 403),
+        (UserRole.VIEWER, "POST", "/report_asset_check/my_asset", 403),
+        (UserRole.LAUNCHER, "POST", "/report_asset_materialization/my/asset", 200),
+        (UserRole.VIEWER, "GET", "/runs", 200),
+    ],
+)
+def test_default_route_permissions(role, method, path, status_code):
+    response = _client(_make_user(role)).request(method, path)
+    assert response.status_code == status_code
+
+
+def test_inactive_user_is_denied():
+    response = _client(_make_user(UserRole.ADMIN, is_active=False)).get("/logs/x")
+    assert response.status_code == 403
+
+
+def test_guard_error_matches_decorator():
+    client = _client(
+        _make_user(UserRole.VIEWER),
+        {
+            "/guarded": [Permission.LAUNCH_RUNS],
+            "/schedules": [Permission.START_SCHEDULES, Permission.STOP_SCHEDULES],
+        },
+    )
+
+    launch_error = {"error": "Permission 'launch_runs' required"}
+    assert client.get("/launch").json() == launch_error
+    assert client.get("/guarded").json() == launch_error
+    assert client.get("/schedules").json() == {
+        "error": "Permissions 'start_schedules', 'stop_schedules' required"
+    }
+
+
+def test_guard_precedence():
+    client = _client(
+        _make_user(UserRole.LAUNCHER),
+        {
+            "/admin/": [Permission.MANAGE_USERS],
+            "/admin/runs/": [Permission.LAUNCH_RUNS],
+            ("GET", "/admin/runs/"): [Permission.VIEW_RUNS],
+            "/jobs": [Permission.VIEW_JOBS],
+            ("POST", "/jobs"): [Permission.UPDATE_WORKSPACE],
+        },
+    )
+
+    assert client.get("/admin/users").status_code == 403
+    assert client.post("/admin/runs/1").status_code == 200
+    assert client.get("/admin/runs/1").status_code == 200
+    assert client.get("/jobs").status_code == 200
+    assert client.post("/jobs").status_code == 403
+    # Exact paths aren't prefixes
+    assert client.post("/jobs/1").status_code == 200
+
+
+@pytest.mark.parametrize("method", ["GET", "TRACE", "PROPFIND", "CUSTOM"])
+def test_path_rules_guard_every_method(method):
+    client = _client(
+        _make_user(UserRole.VIEWER),
+        {"/admin": [Permission.MANAGE_USERS], "/admin/": [Permission.MANAGE_USERS]},
+    )
+
+    assert client.request(method, "/admin").status_code == 403
+    assert client.request(method, "/admin/users").status_code == 403
@@ -0,0 +1,89 @@
+import asyncio
+import re
+from urllib.parse import unquote
+
+import pytest
+from dagster_webserver.auth.auth_backend import GitHubOAuthBackend
+from dagster_webserver.auth.routes import AuthRoutes
+from dagster_webserver.auth.session_manager import SessionManager
+from dagster_webserver.auth.user_store import UserStore
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.testclient import TestClient
+
+
+class FakeGitHubOAuthBackend(GitHubOAuthBackend):
+    def __init__(self):
+        super().__init__("client-id", "client-secret", "http://localhost/auth/callback")
+        self.token_exchanges = 0
+
+    async def exchange_code_for_token_async(self, code, state):
+        self.token_exchanges += 1
+        await asyncio.sleep(0.01)
+        return {"access_token": f"token-{self.token_exchanges}"}
+
+    async def get_user_info_async(self, access_token):
+        return {
+            "id": 1,
+            "login": "alice",
+            "email": "alice@example.com",
+            "name": "Alice",
+            "avatar_url": None,
+        }
+
+
+@pytest.fixture
+def auth_routes(tmp_path):
+    backend = FakeGitHubOAuthBackend()
+    user_store = UserStore(str(tmp_path / "users.json"))
+    yield AuthRoutes(backend, SessionManager(), user_store)
+    user_store.close()
+    backend.close()
+
+
+def test_duplicate_callbacks_share_one_login(auth_routes):
+    async def login_twice():
+        return await asyncio.gather(
+            auth_routes._login_once("code", "state"),  # noqa: SLF001
+            auth_routes._login_once("code", "state"),  # noqa: SLF001
+        )
+
+    first, second = asyncio.run(login_twice())
+    assert first == second
+    assert auth_routes.auth_backend.token_exchanges == 1
+    assert not auth_routes._inflight_logins  # noqa: SLF001
+
+
+def test_callbacks_with_different_state_do_not_share_login(auth_routes):
+    async def login_from_two_browsers():
+        return await asyncio.gather(
+            auth_routes._login_once("code", "victim-state"),  # noqa: SLF001
+            auth_routes._login_once("code", "attacker-state"),  # noqa: SLF001
+        )
+
+    victim_session, attacker_session = asyncio.run(login_from_two_browsers())
+    assert victim_session != attacker_session
+    assert auth_routes.auth_backend.token_exchanges == 2
+
+
+def test_callback_state_cannot_be_replayed(auth_routes):
+    app = Starlette(
+        routes=auth_routes.get_routes(),
+        middleware=[Middleware(SessionMiddleware, secret_key="secret")],
+    )
+    client = TestClient(app, follow_redirects=False)
+
+    login = client.get("/auth/login", headers={"accept-encoding": "identity"})
+    state = unquote(re.search(r"state=([^&\"]+)", login.text).group(1))
+    session_cookie = client.cookies["session"]
+
+    response = client.get("/auth/callback", params={"code": "code", "state": state})
+    assert response.status_code == 302
+    assert "dagster_session_id" in response.cookies
+
+    # Replay the callback with the session cookie from before the login
+    client.cookies.clear()
+    client.cookies.set("session", session_cookie)
+    response = client.get("/auth/callback", params={"code": "code", "state": state})
+    assert response.status_code == 400
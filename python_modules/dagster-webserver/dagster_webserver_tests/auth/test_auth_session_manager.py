@@ -0,0 +1,147 @@
+import string
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from dagster_webserver.auth import session_manager as session_manager_module
+from dagster_webserver.auth.models import User, UserRole
+from dagster_webserver.auth.session_manager import SessionManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(session_manager_module.time, "monotonic", clock)
+    return clock
+
+
+def _make_user(username):
+    now = datetime.now(timezone.utc)
+    return User(
+        username=username,
+        email=f"{username}@example.com",
+        full_name=None,
+        role=UserRole.VIEWER,
+        provider="github",
+        provider_id=username,
+        created_at=now,
+        last_login=now,
+    )
+
+
+def test_session_lookup():
+    manager = SessionManager()
+    session_id = manager.create_session(_make_user("alice"))
+
+    assert manager.get_user_from_session(session_id).username == "alice"
+    assert manager.get_user_from_session("not-a-session") is None
+    other_char = "A" if session_id[-1] != "A" else "B"
+    assert manager.get_user_from_session(session_id[:-1] + other_char) is None
+
+
+def test_session_expires(clock):
+    manager = SessionManager(session_timeout=60)
+    session_id = manager.create_session(_make_user("alice"))
+
+    clock.now += 60
+    assert manager.get_user_from_session(session_id) is not None
+
+    clock.now += 61
+    assert manager.get_user_from_session(session_id) is None
+    assert manager.get_active_session_count() == 0
+
+
+def test_cleanup_removes_expired_sessions(clock):
+    manager = SessionManager(session_timeout=60)
+    invalidated = []
+    manager.add_invalidation_listener(invalidated.append)
+    expired_id = manager.create_session(_make_user("alice"))
+    refreshed_id = manager.create_session(_make_user("bob"))
+
+    clock.now += 30
+    manager.refresh_session(refreshed_id)
+    clock.now += 31
+    manager.cleanup_expired_sessions()
+
+    assert invalidated == [expired_id]
+    assert manager.get_user_from_session(expired_id) is None
+    assert manager.get_user_from_session(refreshed_id).username == "bob"
+
+    clock.now += 61
+    manager.cleanup_expired_sessions()
+    assert invalidated == [expired_id, refreshed_id]
+    assert manager.get_active_session_count() == 0
+
+
+def test_cleanup_terminates_for_session_expiring_now(clock):
+    manager = SessionManager(session_timeout=60)
+    session_id = manager.create_session(_make_user("alice"))
+
+    clock.now += 60
+    manager.cleanup_expired_sessions()
+
+    assert manager.get_user_from_session(session_id) is None
+
+
+def test_invalidate_all_user_sessions():
+    manager = SessionManager()
+    alice_ids = [manager.create_session(_make_user("alice")) for _ in range(3)]
+    bob_id = manager.create_session(_make_user("bob"))
+
+    assert manager.get_user_session_count("alice") == 3
+    manager.invalidate_all_user_sessions("alice")
+
+    assert manager.get_user_session_count("alice") == 0
+    assert all(manager.get_user_from_session(i) is None for i in alice_ids)
+    assert manager.get_user_from_session(bob_id).username == "bob"
+
+
+def test_session_ids_have_a_single_encoding():
+    manager = SessionManager()
+    session_id = manager.create_session(_make_user("alice"))
+
+    assert len(session_id) == 32
+    assert set(session_id) <= set(string.ascii_letters + string.digits + "-_")
+    for variant in [
+        session_id + "=",
+        session_id.replace("-", "+").replace("_", "/"),
+        " " + session_id[1:],
+    ]:
+        if variant != session_id:
+            assert manager.get_user_from_session(variant) is None
+            assert not manager.invalidate_session(variant)
+    assert manager.get_user_from_session(session_id) is not None
+
+
+def test_concurrent_sessions_across_shards():
+    manager = SessionManager()
+    errors = []
+
+    def worker(username):
+        try:
+            for _ in range(100):
+                session_id = manager.create_session(_make_user(username))
+                assert manager.get_user_from_session(session_id).username == username
+                assert manager.invalidate_session(session_id)
+            for _ in range(10):
+                manager.create_session(_make_user(username))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(f"user-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert manager.get_active_session_count() == 80
+    assert manager.get_user_session_count("user-0") == 10
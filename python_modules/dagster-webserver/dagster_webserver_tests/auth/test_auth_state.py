@@ -0,0 +1,43 @@
+from dagster_webserver.auth import auth_backend
+from dagster_webserver.auth.auth_backend import AuthState
+
+
+def test_valid_state():
+    auth_state = AuthState(secret_key="secret")
+    assert auth_state.validate_state(auth_state.generate_state())
+
+
+def test_tampered_state_is_rejected():
+    auth_state = AuthState(secret_key="secret")
+    state = auth_state.generate_state()
+
+    tampered = state[:4] + ("A" if state[4] != "A" else "B") + state[5:]
+    assert not auth_state.validate_state(tampered)
+    assert not auth_state.validate_state("")
+    assert not auth_state.validate_state("not base64!")
+    assert not auth_state.validate_state("é")
+
+
+def test_state_from_another_secret_is_rejected():
+    state = AuthState(secret_key="secret").generate_state()
+    assert AuthState(secret_key="secret").validate_state(state)
+    assert not AuthState(secret_key="other-secret").validate_state(state)
+
+
+def test_expired_state_is_rejected(monkeypatch):
+    auth_state = AuthState(secret_key="secret")
+    state = auth_state.generate_state()
+
+    issued_at = auth_backend.time.time()
+    monkeypatch.setattr(auth_backend.time, "time", lambda: issued_at + 601)
+    assert not auth_state.validate_state(state)
+    assert not auth_state.consume_state(state)
+
+
+def test_state_can_only_be_consumed_once():
+    auth_state = AuthState(secret_key="secret")
+    state = auth_state.generate_state()
+
+    assert auth_state.consume_state(state)
+    assert not auth_state.consume_state(state)
+    assert auth_state.consume_state(auth_state.generate_state())
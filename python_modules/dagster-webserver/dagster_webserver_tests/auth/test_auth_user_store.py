@@ -0,0 +1,213 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from dagster_webserver.auth.models import User, UserRole
+from dagster_webserver.auth.user_store import UserStore
+
+
+def _make_user(username, email=None, provider_id=None, role=UserRole.VIEWER):
+    now = datetime.now(timezone.utc)
+    return User(
+        username=username,
+        email=email or f"{username}@example.com",
+        full_name=None,
+        role=role,
+        provider="github",
+        provider_id=provider_id or username,
+        created_at=now,
+        last_login=now,
+    )
+
+
+@pytest.fixture
+def storage_path(tmp_path):
+    return str(tmp_path / "users.json")
+
+
+def test_changes_are_replayed_from_log(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice"))
+    store.create_or_update_user(_make_user("bob"))
+    store.update_user_role("alice", UserRole.EDITOR)
+    store.delete_user("bob")
+    store.close()
+
+    reloaded = UserStore(storage_path)
+    assert [user.username for user in reloaded.list_users()] == ["alice"]
+    assert reloaded.get_user("alice").role == UserRole.EDITOR
+    assert reloaded.count_users_by_role()[UserRole.EDITOR] == 1
+    reloaded.close()
+
+
+def test_compaction_writes_snapshot_and_truncates_log(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice"))
+    for role in [UserRole.EDITOR, UserRole.ADMIN, UserRole.VIEWER] * 3:
+        store.update_user_role("alice", role)
+        store.flush()
+    store.update_user_role("alice", UserRole.ADMIN)
+    store.close()
+
+    log_entries = store.log_path.read_bytes().splitlines()
+    assert len(log_entries) <= UserStore.COMPACTION_FACTOR
+    with open(storage_path) as f:
+        assert "alice" in json.load(f)["users"]
+
+    reloaded = UserStore(storage_path)
+    assert reloaded.get_user("alice").role == UserRole.ADMIN
+    reloaded.close()
+
+
+def test_interrupted_compaction_does_not_roll_back_changes(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice"))
+    store.create_or_update_user(_make_user("bob"))
+    store.flush()
+    stale_log = store.log_path.read_bytes()
+
+    # These changes only reach storage through the snapshot
+    store.update_user_role("alice", UserRole.ADMIN)
+    store.delete_user("bob")
+    store._needs_compaction = True  # noqa: SLF001
+    store.flush()
+    store.close()
+
+    # Simulate a crash after the snapshot was replaced but before the log was
+    # truncated
+    store.log_path.write_bytes(stale_log)
+
+    reloaded = UserStore(storage_path)
+    assert reloaded.get_user("alice").role == UserRole.ADMIN
+    assert reloaded.get_user("bob") is None
+    reloaded.close()
+
+
+def test_partial_log_entry_is_ignored(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice"))
+    store.close()
+    with open(store.log_path, "ab") as f:
+        f.write(b'{"seq": 2, "op": "ups')
+
+    reloaded = UserStore(storage_path)
+    assert reloaded.get_user("alice") is not None
+    reloaded.close()
+
+
+def test_legacy_snapshot_is_loaded(storage_path):
+    with open(storage_path, "w") as f:
+        json.dump({"alice": _make_user("alice").to_dict()}, f)
+
+    store = UserStore(storage_path)
+    assert store.get_user("alice") is not None
+    store.close()
+
+
+def test_role_assignments(storage_path):
+    store = UserStore(storage_path, role_assignments={"alice@example.com": "admin"})
+    assert store.create_or_update_user(_make_user("alice")).role == UserRole.ADMIN
+
+    store.create_or_update_user(_make_user("bob"))
+    store.update_role_assignments({"bob": "editor"})
+    assert store.get_user("bob").role == UserRole.EDITOR
+    assert [user.username for user in store.get_users_with_role(UserRole.EDITOR)] == ["bob"]
+    store.close()
+
+
+def test_provider_id_index(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice", provider_id="1"))
+
+    assert store.get_user_by_provider_id("github", "1").username == "alice"
+    assert store.get_user_by_provider_id("gitlab", "1") is None
+
+    store.create_or_update_user(_make_user("alice", provider_id="2"))
+    assert store.get_user_by_provider_id("github", "1") is None
+    assert store.get_user_by_provider_id("github", "2").username == "alice"
+
+    store.delete_user("alice")
+    assert store.get_user_by_provider_id("github", "2") is None
+    store.close()
+
+
+def test_email_index(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice"))
+
+    assert store.get_user_by_email("alice@example.com").username == "alice"
+    assert store.get_user_by_email("bob@example.com") is None
+
+    store.create_or_update_user(_make_user("alice", email="alice@corp.example.com"))
+    assert store.get_user_by_email("alice@example.com") is None
+    assert store.get_user_by_email("alice@corp.example.com").username == "alice"
+    store.close()
+
+
+def test_email_index_with_shared_email(storage_path):
+    store = UserStore(storage_path)
+    store.create_or_update_user(_make_user("alice", email="team@example.com"))
+    store.create_or_update_user(_make_user("bob", email="team@example.com"))
+
+    assert store.get_user_by_email("team@example.com").username == "alice"
+
+    store.delete_user("alice")
+    assert store.get_user_by_email("team@example.com").username == "bob"
+
+    store.delete_user("bob")
+    assert store.get_user_by_email("team@example.com") is None
+    store.close()
+
+
+def test_changes_are_flushed_in_background(storage_path):
+    store = UserStore(storage_path)
+    for role in [UserRole.VIEWER, UserRole.EDITOR, UserRole.ADMIN]:
+        store.create_or_update_user(_make_user("alice", role=role))
+
+    deadline = time.monotonic() + 10
+    while not store.log_path.read_bytes() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # The burst of changes is written together, and all of them are replayed
+    entries = [json.loads(line) for line in store.log_path.read_bytes().splitlines()]
+    assert [entry["user"]["role"] for entry in entries] == ["viewer", "editor", "admin"]
+    store.close()
+
+
+def test_concurrent_readers_and_writers(storage_path):
+    store = UserStore(storage_path)
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(50):
+                store.create_or_update_user(_make_user(f"user-{worker}-{i}"))
+                store.delete_user(f"user-{worker}-{i // 2}")
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(200):
+                assert min(store.count_users_by_role().values()) >= 0
+                store.list_users()
+                store.get_user_by_email("user-0-1@example.com")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert store.count_users_by_role()[UserRole.VIEWER] == len(store.list_users())
+    store.close()
+
+    reloaded = UserStore(storage_path)
+    assert len(reloaded.list_users()) == len(store.list_users())
+    reloaded.close()
@@ -537,6 +537,12 @@ def authentication_config_schema() -> Mapping[str, Field]:
             default_value=86400,  # 24 hours
             description="Session timeout in seconds"
         ),
+        "cleanup_interval": Field(
+            IntSource,
+            is_required=False,
+            default_value=60,
+            description="Seconds between sweeps that remove expired sessions"
+        ),
         "github": Field(
             {
                 "client_id": Field(StringSource, is_required=True),